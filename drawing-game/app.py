@@ -2,21 +2,47 @@ import eventlet
 eventlet.monkey_patch()
 from flask import Flask, render_template
 from extensions.socketio import socketio
+from extensions.metrics import instrument_app
 from blueprints.packs.Routes import packs_bp
+from blueprints.metrics.Routes import metrics_bp
+from services.PackService import get_pack_service
+from game.words import word_tables, DEFAULT_PACK
+from game.state import lobbies
 import os
+import time
 
 app = Flask(__name__)
 socketio.init_app(app)
+instrument_app(app)
 app.register_blueprint(packs_bp, url_prefix="/api")
+app.register_blueprint(metrics_bp)
 socketio_app = app
 
 # Import socketIO events after loading app
 import game.events
 
+def warm_up():
+    """
+    Builds the lazily created services (Mongo connection, indexes, seeding, the
+    default word table, the lobby store) so the first player does not pay for it.
+    Runs in the background; the server already accepts connections meanwhile.
+    """
+    started = time.perf_counter()
+    try:
+        get_pack_service()
+        word_tables.get(DEFAULT_PACK)
+        lobbies.store
+    except Exception as e:
+        print(f"Warm-up failed, services will be built on first use: {e}")
+        return
+    print(f"Warm-up done in {(time.perf_counter() - started) * 1000:.0f} ms")
+
 @app.route("/")
 def index():
     return render_template("index.html"), 200
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
+    if os.environ.get("WARM_UP", "1") != "0":
+        socketio.start_background_task(warm_up)
     socketio.run(app, host="0.0.0.0", port=port)
@@ -0,0 +1,98 @@
+"""
+Startup latency benchmark: how long importing the server's modules takes.
+
+Each module is imported in a fresh interpreter, several times, with MONGO_URI
+pointing at a port nothing listens on. Importing must not touch the database,
+so an import that tries to connect shows up as a timeout or a huge number here.
+
+Usage (from drawing-game/):
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 10 --max-ms 1500 --json results.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "services.PackService",
+    "game.state",
+    "blueprints.packs.Routes",
+    "app",
+]
+
+SNIPPET = (
+    "import time; t = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def time_import(module, timeout):
+    env = dict(os.environ)
+    env["MONGO_URI"] = "mongodb://127.0.0.1:9/unreachable"
+    env["LOBBY_STORE"] = "memory"
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+
+    proc = subprocess.run(
+        [sys.executable, "-c", SNIPPET.format(module=module)],
+        cwd=PROJECT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    return float(proc.stdout.strip().splitlines()[-1]) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds per import before giving up")
+    parser.add_argument("--max-ms", type=float, default=None, help="exit 1 if any median exceeds this")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    failed = False
+
+    for module in MODULES:
+        try:
+            samples = [time_import(module, args.timeout) for _ in range(args.runs)]
+        except subprocess.TimeoutExpired:
+            results[module] = {"error": f"timed out after {args.timeout}s"}
+            failed = True
+        except RuntimeError as e:
+            results[module] = {"error": str(e)}
+            failed = True
+        else:
+            results[module] = {
+                "median_ms": round(statistics.median(samples), 1),
+                "min_ms": round(min(samples), 1),
+                "max_ms": round(max(samples), 1),
+            }
+            if args.max_ms is not None and results[module]["median_ms"] > args.max_ms:
+                failed = True
+
+    width = max(len(m) for m in MODULES)
+    for module, result in results.items():
+        if "error" in result:
+            print(f"{module:<{width}}  ERROR  {result['error']}")
+        else:
+            print(f"{module:<{width}}  median {result['median_ms']:8.1f} ms  "
+                  f"(min {result['min_ms']:.1f}, max {result['max_ms']:.1f})")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
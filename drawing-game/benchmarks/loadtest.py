@@ -0,0 +1,452 @@
+"""
+Load test: many lobbies of scripted players on real Socket.IO connections.
+
+Every lobby gets --players bots. Whoever the server makes drawer streams strokes
+(startPath, draw at --draw-hz, endPath) with an undo every few strokes; the
+others chat now and then. Some bots join late and some drop and reconnect.
+
+Latency is measured end to end with probes: each startPath and chat message
+carries its send time and an ID. Probes that did not reach every player who was
+in the lobby when they were sent count as dropped. Draw points arrive batched,
+so they are counted rather than timed. Server CPU is read from /proc for the
+process started with --spawn (or --server-pid).
+
+Needs the python-socketio client: pip install "python-socketio[client]"
+
+Usage (from drawing-game/):
+    python benchmarks/loadtest.py --spawn
+    python benchmarks/loadtest.py --url http://127.0.0.1:5000 --lobbies 20 --players 6 \\
+        --duration 60 --json results.json
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CANVAS_WIDTH = 800
+CANVAS_HEIGHT = 600
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_DIR, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def cpu_seconds(pid):
+    """utime + stime of a process, Linux only."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+class Results:
+    """Shared by every bot thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.probe_ids = itertools.count(1)
+        self.probes = {}  # id -> (kind, sent_at, expected recipient bots)
+        self.latency = {"startPath": [], "chat": []}
+        self.delivered = {"startPath": 0, "chat": 0}
+        self.expected = {"startPath": 0, "chat": 0}
+        self.counts = {
+            "draw_points_sent": 0,
+            "draw_points_received": 0,
+            "undos_sent": 0,
+            "rate_limited": 0,
+            "joins": 0,
+            "reconnects": 0,
+            "connect_errors": 0,
+        }
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.counts[key] += amount
+
+    def new_probe(self, kind, recipients):
+        with self.lock:
+            probe_id = next(self.probe_ids)
+            self.probes[probe_id] = (kind, time.perf_counter(), recipients)
+            self.expected[kind] += len(recipients)
+        return probe_id
+
+    def received(self, probe_id, bot):
+        now = time.perf_counter()
+        with self.lock:
+            probe = self.probes.get(probe_id)
+            if probe is None or bot not in probe[2]:
+                return
+            kind, sent_at, recipients = probe
+            recipients.discard(bot)
+            self.delivered[kind] += 1
+            self.latency[kind].append((now - sent_at) * 1000)
+
+    def forget(self, bot):
+        """A bot that left cannot receive what is still in flight; stop expecting it."""
+        with self.lock:
+            for kind, _, recipients in self.probes.values():
+                if bot in recipients:
+                    recipients.discard(bot)
+                    self.expected[kind] -= 1
+
+    def summary(self):
+        out = {}
+        for kind, samples in self.latency.items():
+            expected = self.expected[kind]
+            out[kind] = {
+                "probes": sum(1 for p in self.probes.values() if p[0] == kind),
+                "expected": expected,
+                "delivered": self.delivered[kind],
+                "dropped": expected - self.delivered[kind],
+                "drop_rate": round((expected - self.delivered[kind]) / expected, 4) if expected else 0.0,
+                "p50_ms": _round(percentile(samples, 50)),
+                "p90_ms": _round(percentile(samples, 90)),
+                "p99_ms": _round(percentile(samples, 99)),
+                "max_ms": _round(max(samples) if samples else None),
+                "mean_ms": _round(statistics.fmean(samples) if samples else None),
+            }
+        out["counts"] = dict(self.counts)
+        return out
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+class Bot:
+    def __init__(self, lobby, index, args, results):
+        self.lobby = lobby
+        self.index = index
+        self.args = args
+        self.results = results
+        self.name = f"{lobby.lobby_id}-p{index}"
+        self.role = None
+        self.joined = False
+        self.client = None
+
+    def connect(self):
+        import socketio
+
+        client = socketio.Client(reconnection=False)
+        client.on("wireFormat", self.on_joined)
+        client.on("roundStarting", self.on_round_starting)
+        client.on("roundStarted", self.on_round_started)
+        client.on("lobbyReset", self.on_round_starting)
+        client.on("startPath", self.on_start_path)
+        client.on("drawBatch", self.on_draw_batch)
+        client.on("chatMessage", self.on_chat)
+        client.on("rateLimited", self.on_rate_limited)
+        client.on("disconnect", self.on_disconnect)
+
+        try:
+            client.connect(self.args.url, transports=["websocket"], wait_timeout=10)
+        except Exception as e:
+            self.results.count("connect_errors")
+            print(f"{self.name}: connect failed: {e}", file=sys.stderr)
+            return False
+
+        self.client = client
+        client.emit("join", {
+            "name": self.name,
+            "avatar": "avatar1",
+            "id": self.name,
+            "lobby": self.lobby.lobby_id,
+        })
+        self.results.count("joins")
+        return True
+
+    def disconnect(self):
+        self.joined = False
+        self.role = None
+        self.results.forget(self)
+        if self.client is not None:
+            try:
+                self.client.disconnect()
+            except Exception:
+                pass
+            self.client = None
+
+    def emit(self, event, data=None):
+        client = self.client
+        if client is None or not self.joined:
+            return False
+        try:
+            if data is None:
+                client.emit(event)
+            else:
+                client.emit(event, data)
+        except Exception:
+            return False
+        return True
+
+    # --- server events ---
+
+    def on_joined(self, data):
+        self.joined = True
+
+    def on_disconnect(self, *args):
+        self.joined = False
+        self.role = None
+        self.results.forget(self)
+
+    def on_round_starting(self, data=None):
+        self.role = None
+
+    def on_round_started(self, data):
+        self.role = data.get("role")
+
+    def on_start_path(self, data):
+        probe_id = data.get("probe")
+        if probe_id is not None:
+            self.results.received(probe_id, self)
+
+    def on_draw_batch(self, data):
+        self.results.count("draw_points_received", len(data.get("points", ())) // 2)
+
+    def on_chat(self, data):
+        message = data.get("message") or ""
+        if message.startswith("probe:"):
+            try:
+                self.results.received(int(message.split(":")[1]), self)
+            except (IndexError, ValueError):
+                pass
+
+    def on_rate_limited(self, data):
+        self.results.count("rate_limited")
+
+
+class Lobby:
+    def __init__(self, number, args, results):
+        self.lobby_id = f"{args.lobby_prefix}{number}"
+        self.args = args
+        self.results = results
+        self.rng = random.Random(args.seed * 1000 + number)
+        self.bots = [Bot(self, i, args, results) for i in range(args.players)]
+
+    def others(self, sender):
+        return {bot for bot in self.bots if bot is not sender and bot.joined}
+
+    def run(self, deadline):
+        late_count = int(round(len(self.bots) * self.args.late_join))
+        on_time, late = self.bots[:len(self.bots) - late_count], self.bots[len(self.bots) - late_count:]
+
+        for bot in on_time:
+            bot.connect()
+
+        threads = [threading.Thread(target=self.draw_loop, args=(deadline,), daemon=True)]
+        threads += [threading.Thread(target=self.chat_loop, args=(bot, deadline), daemon=True) for bot in self.bots]
+        for thread in threads:
+            thread.start()
+
+        # Late joiners show up spread over the first third of the run
+        join_window = max(0.0, (deadline - time.monotonic()) / 3)
+        for bot in late:
+            time.sleep(self.rng.uniform(0, join_window / max(1, len(late))))
+            bot.connect()
+
+        for thread in threads:
+            thread.join()
+
+    def drawer(self):
+        for bot in self.bots:
+            if bot.role == "drawer" and bot.joined:
+                return bot
+        return None
+
+    def draw_loop(self, deadline):
+        interval = 1 / self.args.draw_hz
+        strokes = 0
+
+        while time.monotonic() < deadline:
+            bot = self.drawer()
+            if bot is None:
+                time.sleep(0.05)
+                continue
+
+            x, y = self.rng.randrange(CANVAS_WIDTH), self.rng.randrange(CANVAS_HEIGHT)
+            probe_id = self.results.new_probe("startPath", self.others(bot))
+            if not bot.emit("startPath", {
+                "x": x, "y": y, "size": 5, "color": "#000000", "tool": "brush",
+                "probe": probe_id
+            }):
+                continue
+
+            for _ in range(self.rng.randint(20, 80)):
+                if time.monotonic() >= deadline or bot.role != "drawer":
+                    break
+                x = min(CANVAS_WIDTH - 1, max(0, x + self.rng.randint(-6, 6)))
+                y = min(CANVAS_HEIGHT - 1, max(0, y + self.rng.randint(-6, 6)))
+                if bot.emit("draw", {"x": x, "y": y}):
+                    # Every other bot in the lobby should see the point
+                    self.results.count("draw_points_sent", len(self.others(bot)))
+                time.sleep(interval)
+
+            bot.emit("endPath")
+            strokes += 1
+            if self.args.undo_every and strokes % self.args.undo_every == 0:
+                if bot.emit("undo"):
+                    self.results.count("undos_sent")
+            time.sleep(self.rng.uniform(0.05, 0.3))
+
+    def chat_loop(self, bot, deadline):
+        while time.monotonic() < deadline:
+            time.sleep(self.rng.expovariate(1 / self.args.chat_interval))
+            if time.monotonic() >= deadline:
+                break
+
+            if bot.joined and bot.role == "guesser":
+                probe_id = self.results.new_probe("chat", self.others(bot))
+                bot.emit("chatMessage", {"message": f"probe:{probe_id}:{bot.name}"})
+
+            # Now and then a guesser drops out and comes back on a new connection
+            if bot.joined and bot.role == "guesser" and self.rng.random() < self.args.reconnect_rate:
+                bot.disconnect()
+                time.sleep(self.rng.uniform(0.5, 2.0))
+                if time.monotonic() < deadline and bot.connect():
+                    self.results.count("reconnects")
+
+
+def spawn_server(port):
+    env = dict(os.environ)
+    env["PORT"] = str(port)
+    env.setdefault("WARM_UP", "0")
+    proc = subprocess.Popen(
+        [sys.executable, "app.py"], cwd=PROJECT_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        try:
+            urllib.request.urlopen(url, timeout=1).close()
+            return proc, url
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("server did not start listening")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--spawn", action="store_true", help="start app.py on --port for the run")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--server-pid", type=int, default=None, help="measure CPU of an already running server")
+    parser.add_argument("--lobbies", type=int, default=5)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    parser.add_argument("--drain", type=float, default=2.0, help="seconds to wait for in-flight events")
+    parser.add_argument("--draw-hz", type=float, default=60.0, help="draw events per second while stroking")
+    parser.add_argument("--chat-interval", type=float, default=3.0, help="mean seconds between a guesser's messages")
+    parser.add_argument("--undo-every", type=int, default=5, help="undo after every Nth stroke, 0 for never")
+    parser.add_argument("--late-join", type=float, default=0.25, help="fraction of players that join mid-run")
+    parser.add_argument("--reconnect-rate", type=float, default=0.05, help="chance a guesser drops after a message")
+    parser.add_argument("--lobby-prefix", default="load-")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="json_path", default=None, help="also write results to this file")
+    args = parser.parse_args()
+
+    try:
+        import socketio  # noqa: F401
+    except ImportError:
+        sys.exit('loadtest needs the Socket.IO client: pip install "python-socketio[client]"')
+
+    server = None
+    server_pid = args.server_pid
+    if args.spawn:
+        server, args.url = spawn_server(args.port)
+        server_pid = server.pid
+
+    results = Results()
+    lobbies = [Lobby(n, args, results) for n in range(args.lobbies)]
+
+    cpu_before = cpu_seconds(server_pid) if server_pid else None
+    started = time.monotonic()
+    deadline = started + args.duration
+
+    try:
+        threads = [threading.Thread(target=lobby.run, args=(deadline,), daemon=True) for lobby in lobbies]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        time.sleep(args.drain)
+        elapsed = time.monotonic() - started
+        cpu_after = cpu_seconds(server_pid) if server_pid else None
+        # Before disconnecting, which would stop counting undelivered probes as dropped
+        summary = results.summary()
+    finally:
+        for lobby in lobbies:
+            for bot in lobby.bots:
+                bot.disconnect()
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    report = {
+        "commit": git_commit(),
+        "config": {
+            "lobbies": args.lobbies,
+            "players": args.players,
+            "duration_s": args.duration,
+            "draw_hz": args.draw_hz,
+            "chat_interval_s": args.chat_interval,
+            "undo_every": args.undo_every,
+            "late_join": args.late_join,
+            "reconnect_rate": args.reconnect_rate,
+            "seed": args.seed,
+        },
+        **summary,
+    }
+    if cpu_before is not None and cpu_after is not None:
+        report["server_cpu"] = {
+            "seconds": round(cpu_after - cpu_before, 2),
+            "percent": round((cpu_after - cpu_before) / elapsed * 100, 1),
+        }
+
+    for kind in ("startPath", "chat"):
+        r = report[kind]
+        latency = (f"p50 {r['p50_ms']} ms  p90 {r['p90_ms']} ms  p99 {r['p99_ms']} ms  max {r['max_ms']} ms"
+                   if r["delivered"] else "no deliveries")
+        print(f"{kind:<10} {r['delivered']}/{r['expected']} delivered ({r['drop_rate']:.2%} dropped)  {latency}")
+    counts = report["counts"]
+    print(f"draw points {counts['draw_points_received']}/{counts['draw_points_sent']} received, "
+          f"{counts['undos_sent']} undos, {counts['rate_limited']} rate limited, "
+          f"{counts['reconnects']} reconnects, {counts['connect_errors']} connect errors")
+    if "server_cpu" in report:
+        print(f"server CPU {report['server_cpu']['seconds']} s ({report['server_cpu']['percent']}% of one core)")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Microbenchmarks for the code that runs on every game event.
+
+Handlers are called directly inside a Flask request context, entered once per
+benchmark rather than per call, with emits, room changes and background tasks
+stubbed out, so nothing touches the network or the database. Timings are per call, the best of several repeats, and are
+scaled by a fixed pure-Python calibration loop so a baseline recorded on one
+machine stays meaningful on another.
+
+Usage (from drawing-game/):
+    python benchmarks/microbench.py                    # run, compare with the baseline if there is one
+    python benchmarks/microbench.py --save-baseline    # record benchmarks/microbench_baseline.json
+    python benchmarks/microbench.py -k chat --threshold 0.15
+    python benchmarks/microbench.py --ci               # as above, but no baseline is a failure too
+
+Exits 1 if any benchmark is slower than its baseline by more than --threshold,
+or with --ci (the default when CI is set) if there is no baseline to compare with.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(PROJECT_DIR, "benchmarks", "microbench_baseline.json")
+
+# Raw hot paths: no instrumentation, no rate limiting, no shared store, no pack reloads
+os.environ["METRICS"] = "0"
+os.environ["RATE_LIMIT"] = "0"
+os.environ["LOBBY_STORE"] = "memory"
+os.environ["WORD_TABLE_TTL"] = "1e9"
+os.environ.setdefault("MONGO_URI", "mongodb://127.0.0.1:9/unreachable")
+sys.path.insert(0, PROJECT_DIR)
+
+LONG_PROMPT = " ".join(["supercalifragilistic-expialidocious"] * 6)
+BENCH_WORDS = ["lion", "frog", "hare", "ice cream", LONG_PROMPT]
+
+
+class StubServer:
+    """Stands in for the Socket.IO server: room membership changes do nothing."""
+
+    def enter_room(self, *args, **kwargs):
+        pass
+
+    def leave_room(self, *args, **kwargs):
+        pass
+
+
+class EmitCounter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+
+
+emits = EmitCounter()
+
+
+def install_stubs():
+    from flask import Flask
+    from extensions.socketio import socketio
+    from game.words import word_tables, WordTable, DEFAULT_PACK
+    import game.events as events
+
+    socketio.emit = emits
+    socketio.start_background_task = lambda *args, **kwargs: None
+    socketio.server = StubServer()
+
+    events.emit = emits
+    events.join_room = lambda *args, **kwargs: None
+    events.leave_room = lambda *args, **kwargs: None
+
+    word_tables.tables[DEFAULT_PACK] = WordTable(DEFAULT_PACK, BENCH_WORDS)
+    return Flask("microbench")
+
+
+def make_lobby(lobby_id, players, prompt="ice cream", strokes=0, points_per_stroke=40):
+    """A lobby mid-round: sid-0 draws, everyone else guesses, `strokes` already on the canvas."""
+    from game.state import GameState, lobbies
+    from game.helpers import compute_max_reveals, log_event
+    from game.manager import PHASE_DRAWING
+
+    game_state = GameState(lobby_id)
+    lobbies.lobbies[lobby_id] = game_state
+
+    for i in range(players):
+        sid = f"{lobby_id}-sid-{i}"
+        game_state.players[sid] = {"client_id": sid, "name": f"player {i}", "avatar": "avatar1", "score": 0, "id": i + 1}
+        game_state.players_order.append(sid)
+        lobbies.bind(sid, lobby_id)
+
+    current_round = game_state.current_round
+    current_round["phase"] = PHASE_DRAWING
+    current_round["active"] = True
+    current_round["drawer"] = game_state.players_order[0]
+    current_round["prompt"] = prompt
+    current_round["time_started"] = time.time()
+    current_round["max_reveals"] = compute_max_reveals(len(prompt))
+
+    for stroke in range(strokes):
+        x, y = (stroke * 37) % 700, (stroke * 53) % 500
+        log_event(game_state, "startPath", {"x": x, "y": y, "size": 5, "color": "#000000", "tool": "brush"})
+        for i in range(points_per_stroke):
+            log_event(game_state, "draw", {"x": x + i * 3, "y": y + (i * 7) % 40})
+        game_state.canvas_history.end_stroke()
+
+    return game_state
+
+
+# Contexts a benchmark keeps open for all of its calls; closed once it is measured
+held = contextlib.ExitStack()
+
+
+@contextlib.contextmanager
+def as_client(app, sid):
+    from flask import request
+
+    with app.test_request_context():
+        request.sid = sid
+        yield
+
+
+# --- benchmarks: each returns (op, calls per timing run) ---
+
+def bench_build_masked_word(app):
+    from game.helpers import build_masked_word
+
+    revealed = set(range(0, len(LONG_PROMPT), 5))
+    return lambda: build_masked_word(LONG_PROMPT, revealed), 2000
+
+
+def bench_reveal_random_letters(app):
+    from game.reveal import reveal_random_letters
+
+    game_state = make_lobby("bench-reveal", 8, prompt=LONG_PROMPT)
+    revealed = game_state.current_round["revealed_indices"]
+
+    def op():
+        revealed.clear()
+        reveal_random_letters(game_state, 1)
+    return op, 2000
+
+
+def bench_chat_routing(players):
+    def setup(app):
+        from game.events import handle_chat_message
+
+        game_state = make_lobby(f"bench-chat-{players}", players)
+        payload = {"message": "is it a giraffe"}
+        held.enter_context(as_client(app, game_state.players_order[1]))
+
+        def op():
+            handle_chat_message(payload)
+        return op, 1000
+    return setup
+
+
+def bench_log_event(app):
+    from game.helpers import log_event
+
+    game_state = make_lobby("bench-log", 2)
+    history = game_state.canvas_history
+    counter = [0]
+
+    def op():
+        n = counter[0] = counter[0] + 1
+        if n % 100 == 0:
+            history.end_stroke()
+            log_event(game_state, "startPath", {"x": 10, "y": 10, "size": 5, "color": "#000000", "tool": "brush"})
+        log_event(game_state, "draw", {"x": n % 800, "y": (n * 7) % 600})
+    log_event(game_state, "startPath", {"x": 10, "y": 10, "size": 5, "color": "#000000", "tool": "brush"})
+    return op, 20000
+
+
+def bench_undo_redo(strokes):
+    def setup(app):
+        from game.events import handle_undo, handle_redo
+
+        game_state = make_lobby(f"bench-undo-{strokes}", 8, strokes=strokes)
+        held.enter_context(as_client(app, game_state.current_round["drawer"]))
+
+        # The redo puts the stroke back, so the history size stays fixed
+        def op():
+            handle_undo()
+            handle_redo()
+        return op, 500
+    return setup
+
+
+def bench_late_join(strokes, number):
+    def setup(app):
+        from flask import request
+        from game.events import handle_join
+        from game.state import lobbies
+
+        lobby_id = f"bench-join-{strokes}"
+        game_state = make_lobby(lobby_id, 8, strokes=strokes)
+        counter = [0]
+        held.enter_context(as_client(app, None))
+        held.enter_context(contextlib.redirect_stdout(io.StringIO()))
+
+        def op():
+            counter[0] += 1
+            sid = request.sid = f"{lobby_id}-late-{counter[0]}"
+            # While someone is drawing every join finds the snapshot stale; measure that case
+            game_state.canvas_history._snapshot_cache = None
+            handle_join({"name": "late", "avatar": "avatar1", "id": sid, "lobby": lobby_id})
+
+            # Leave again without the disconnect path, so only the join is measured
+            lobbies.unbind(sid)
+            game_state.players.pop(sid, None)
+            game_state.players_order.remove(sid)
+        return op, number
+    return setup
+
+
+BENCHMARKS = {
+    "build_masked_word[long]": bench_build_masked_word,
+    "reveal_random_letters[long]": bench_reveal_random_letters,
+    "chat_routing[10]": bench_chat_routing(10),
+    "chat_routing[50]": bench_chat_routing(50),
+    "chat_routing[200]": bench_chat_routing(200),
+    "log_event[draw]": bench_log_event,
+    "undo_redo[100]": bench_undo_redo(100),
+    "undo_redo[1000]": bench_undo_redo(1000),
+    "undo_redo[5000]": bench_undo_redo(5000),
+    "late_join[0]": bench_late_join(0, 200),
+    "late_join[200]": bench_late_join(200, 40),
+    "late_join[2000]": bench_late_join(2000, 5),
+}
+
+
+def measure(op, number, repeat):
+    """Best and median microseconds per call over `repeat` runs of `number` calls."""
+    op()  # warm-up: lazy imports, first allocation
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            op()
+        samples.append((time.perf_counter() - started) / number * 1e6)
+    return min(samples), statistics.median(samples)
+
+
+def calibrate(repeat):
+    """Microseconds for a fixed dict/list workload, the yardstick for this machine."""
+    def op():
+        d = {}
+        for i in range(200):
+            d[i] = [i] * 3
+        return sum(len(v) for v in d.values())
+    return measure(op, 500, max(repeat, 7))[0]
+
+
+def compare(results, baseline, threshold):
+    """Adds ratio/regressed to each result. Ratio > 1 means slower than the baseline."""
+    scale = results["_calibration_us"] / baseline["_calibration_us"]
+    regressed = []
+    for name, result in results["benchmarks"].items():
+        base = baseline["benchmarks"].get(name)
+        if base is None:
+            continue
+        result["ratio"] = round(result["best_us"] / (base["best_us"] * scale), 3)
+        if result["ratio"] > 1 + threshold:
+            regressed.append(name)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="pattern", default=None, help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="fail if a benchmark is this much slower than the baseline (0.25 = 25%%)")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write results to this file")
+    parser.add_argument("--ci", action="store_true", default=bool(os.getenv("CI")),
+                        help="fail if there is no baseline to compare with (default when CI is set)")
+    args = parser.parse_args()
+
+    app = install_stubs()
+
+    calibration = calibrate(args.repeat)
+    results = {"benchmarks": {}}
+    for name, setup in BENCHMARKS.items():
+        if args.pattern and args.pattern not in name:
+            continue
+        with held:
+            op, number = setup(app)
+            best, median = measure(op, number, args.repeat)
+        results["benchmarks"][name] = {"best_us": round(best, 3), "median_us": round(median, 3)}
+
+    # Once more at the end: the best of both is less sensitive to CPU clock ramp-up
+    results["_calibration_us"] = round(min(calibration, calibrate(args.repeat)), 3)
+
+    regressed = []
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressed = compare(results, baseline, args.threshold)
+
+    width = max(len(name) for name in results["benchmarks"]) if results["benchmarks"] else 0
+    for name, result in results["benchmarks"].items():
+        line = f"{name:<{width}}  best {result['best_us']:10.2f} us  median {result['median_us']:10.2f} us"
+        if "ratio" in result:
+            line += f"  x{result['ratio']:.2f} vs baseline"
+            if name in regressed:
+                line += "  REGRESSED"
+        print(line)
+    print(f"calibration {results['_calibration_us']:.2f} us, {emits.calls} stubbed emits")
+    missing_baseline = baseline is None and not args.save_baseline
+    if missing_baseline:
+        print(f"no baseline at {args.baseline}; record one with --save-baseline")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+    sys.exit(1 if regressed or (missing_baseline and args.ci) else 0)
+
+
+if __name__ == "__main__":
+    main()
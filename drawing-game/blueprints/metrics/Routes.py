@@ -0,0 +1,66 @@
+from flask import Blueprint, Response
+from extensions.metrics import Counter, Gauge, registry
+from game.state import lobbies
+from game.scheduler import scheduler
+from game.ratelimit import limiter
+from game.batching import batching_stats
+import os
+
+metrics_bp = Blueprint("metrics", __name__)
+
+# Lobby IDs come from players; only the biggest lobbies get their own series
+METRICS_MAX_LOBBIES = int(os.getenv("METRICS_MAX_LOBBIES", "50"))
+
+
+def game_gauges():
+    """Read at scrape time, so nothing on the game path pays for them."""
+    lobby_count = Gauge("lobbies_active", "Lobbies held by this process")
+    players = Gauge("lobby_players", "Players in a lobby", ("lobby",))
+    history = Gauge("lobby_canvas_history_events", "Logged canvas events in a lobby", ("lobby",))
+    players_total = Gauge("players_connected", "Players in all lobbies of this process")
+    history_total = Gauge("canvas_history_events", "Logged canvas events in all lobbies of this process")
+
+    game_states = list(lobbies.lobbies.values())
+    lobby_count.set(value=len(game_states))
+    players_total.set(value=sum(len(gs.players) for gs in game_states))
+    history_total.set(value=sum(len(gs.canvas_history) for gs in game_states))
+
+    game_states.sort(key=lambda gs: len(gs.canvas_history), reverse=True)
+    for game_state in game_states[:METRICS_MAX_LOBBIES]:
+        players.set(game_state.lobby_id, value=len(game_state.players))
+        history.set(game_state.lobby_id, value=len(game_state.canvas_history))
+
+    timers = Gauge("scheduler_timers", "Round timer wheel counters", ("kind",))
+    for kind, value in scheduler.stats().items():
+        timers.set(kind, value=value)
+
+    limits = limiter.stats()
+    allowed = Counter("ratelimit_allowed_total", "Events let through by the rate limiter", ("event_class",))
+    throttled = Counter("ratelimit_throttled_total", "Events dropped by the rate limiter", ("event_class",))
+    for event_class, value in limits["allowed"].items():
+        allowed.inc(event_class, amount=value)
+    for event_class, value in limits["throttled"].items():
+        throttled.inc(event_class, amount=value)
+    throttling = Gauge("ratelimit_throttling_sids", "Connections currently being throttled")
+    throttling.set(value=limits["throttling_sids"])
+
+    batching = Counter("draw_batching_total", "Draw points in, drawBatch frames out and per-recipient frames saved", ("kind",))
+    for kind, value in batching_stats().items():
+        batching.inc(kind, amount=value)
+
+    return [lobby_count, players_total, history_total, players, history,
+            timers, allowed, throttled, throttling, batching]
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def get_metrics():
+    """
+    GET /metrics
+    Prometheus text format: handler and route latency histograms, emit counts and
+    bytes per event, running background tasks, and per-lobby players and canvas
+    history length.
+    """
+    return Response(
+        registry.render(game_gauges()),
+        content_type="text/plain; version=0.0.4; charset=utf-8"
+    ), 200
@@ -1,13 +1,18 @@
-from flask import Blueprint, jsonify, request
-from services.PackService import pack_service
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from services.PackService import get_pack_service
+import json
 
 packs_bp = Blueprint("packs", __name__)
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
 @packs_bp.route("/packs", methods=["GET"])
 def get_all_packs():
     """
     GET /api/packs
     Returns a list of all packs and their names + words.
+    The body is streamed from the database cursor one pack at a time.
 
     Response:
     {
@@ -20,13 +25,51 @@ def get_all_packs():
             ...
         ]
     }
+
+    GET /api/packs?summary=1&after=<name>&limit=<n>
+    Returns one page of pack names and word counts, ordered by name.
+    Pass "next" back as "after" to get the following page.
+
+    Response:
+    {
+        "success": True,
+        "data": [
+            {"name": "animal-pack", "word_count": 120},
+            ...
+        ],
+        "next": "long-pack"
+    }
     """
+    if request.args.get("summary") in ("1", "true"):
+        try:
+            limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return jsonify({"success": False, "error": "limit must be an integer"}), 400
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        try:
+            page, next_after = get_pack_service().get_pack_summaries(request.args.get("after"), limit)
+            return jsonify({"success": True, "data": page, "next": next_after}), 200
+        except Exception:
+            return jsonify({"success": False, "error": "Server error"}), 500
+
     try:
-        packs = pack_service.get_all_packs()
-        return jsonify({"success": True, "data": packs}), 200
+        # Pull the first batch up front so a database error is still a clean 500
+        cursor = get_pack_service().iter_all_packs()
+        first = next(cursor, None)
     except Exception:
         return jsonify({"success": False, "error": "Server error"}), 500
 
+    def generate():
+        yield '{"success": true, "data": ['
+        if first is not None:
+            yield json.dumps(first)
+            for pack in cursor:
+                yield "," + json.dumps(pack)
+        yield "]}"
+
+    return Response(stream_with_context(generate()), status=200, mimetype="application/json")
+
 @packs_bp.route("/packs", methods=["POST"])
 def create_pack():
     """
@@ -58,7 +101,7 @@ def create_pack():
         return jsonify({"success": False, "error": "words must be a list"}), 400
 
     try:
-        pack_service.create_pack(pack_name, words)
+        get_pack_service().create_pack(pack_name, words)
 
         return jsonify({
             "success": True,
@@ -70,6 +113,80 @@ def create_pack():
         return jsonify({"success": False, "error": "Server error"}), 500
 
 
+@packs_bp.route("/packs/cache/stats", methods=["GET"])
+def get_pack_cache_stats():
+    """
+    GET /api/packs/cache/stats
+    Returns this server process's pack cache counters.
+
+    Response:
+    {
+        "success": True,
+        "data": {
+            "entries": 3,
+            "max_entries": 128,
+            "ttl": 60.0,
+            "hits": 120,
+            "misses": 4,
+            "hit_rate": 0.9677,
+            "evictions": 0,
+            "expirations": 1,
+            "invalidations": 2
+        }
+    }
+    """
+    return jsonify({"success": True, "data": get_pack_service().cache_stats()}), 200
+
+
+@packs_bp.route("/packs/pool/stats", methods=["GET"])
+def get_db_pool_stats():
+    """
+    GET /api/packs/pool/stats
+    Returns this server process's MongoDB connection pool counters.
+
+    Response:
+    {
+        "success": True,
+        "data": {
+            "max_pool_size": 50,
+            "open": 3,
+            "in_use": 1,
+            "max_in_use": 4,
+            "utilization": 0.02,
+            "checkouts": 812,
+            "checkout_failures": 0,
+            "connections_created": 4,
+            "connections_closed": 1,
+            "pool_clears": 0
+        }
+    }
+    """
+    return jsonify({"success": True, "data": get_pack_service().pool_stats()}), 200
+
+
+@packs_bp.route("/packs/indexes/stats", methods=["GET"])
+def get_pack_index_stats():
+    """
+    GET /api/packs/indexes/stats
+    Reports the expected indexes and how often each has been used.
+
+    Response:
+    {
+        "success": True,
+        "data": {
+            "packs": [
+                {"name": "name_unique", "key": {"name": 1}, "ops": 42, "since": "...", "in_use": True},
+                ...
+            ]
+        }
+    }
+    """
+    try:
+        return jsonify({"success": True, "data": get_pack_service().index_report()}), 200
+    except Exception:
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
 @packs_bp.route("/packs/<pack_name>", methods=["GET"])
 def get_pack(pack_name):
     """
@@ -86,7 +203,7 @@ def get_pack(pack_name):
     }
     """
     try:
-        pack = pack_service.get_pack(pack_name)
+        pack = get_pack_service().get_pack(pack_name)
         return jsonify({"success": True, "data": pack}), 200
     except LookupError as e:
         return jsonify({"success": False, "error": str(e)}), 404
@@ -107,7 +224,7 @@ def delete_pack(pack_name):
     }
     """
     try:
-        pack_service.delete_pack(pack_name)
+        get_pack_service().delete_pack(pack_name)
         return jsonify({"success": True, "message": f"Pack {pack_name} deleted."}), 200
     except LookupError as e:
         return jsonify({"success": False, "error": str(e)}), 404
@@ -139,7 +256,7 @@ def add_word_to_pack(pack_name):
         return jsonify({"error": "Missing word"}), 400
 
     try:
-        pack_service.add_word(pack_name, word)
+        get_pack_service().add_word(pack_name, word)
         return jsonify({
             "success": True,
             "message": f"Word {word} successfully added to {pack_name}.",
@@ -152,6 +269,53 @@ def add_word_to_pack(pack_name):
         return jsonify({"success": False, "error": "Server error"}), 500
 
 
+@packs_bp.route("/packs/<pack_name>/words/bulk", methods=["POST"])
+def bulk_update_words(pack_name):
+    """
+    POST /api/packs/<pack_name>/words/bulk
+    Adds and/or removes many words of a pack in a single database write.
+
+    Request:
+    {
+        "add": ["dog", "cat", ...],
+        "remove": ["lion", ...]
+    }
+
+    Response:
+    {
+        "success": True,
+        "counts": {"added": 1, "exists": 1, "removed": 1},
+        "results": [
+            {"word": "dog", "op": "add", "status": "added"},
+            {"word": "cat", "op": "add", "status": "exists"},
+            {"word": "lion", "op": "remove", "status": "removed"}
+        ]
+    }
+    Statuses: added | exists | removed | missing | invalid | duplicate
+    """
+    data = request.get_json(silent=True) or {}
+    add = data.get("add", [])
+    remove = data.get("remove", [])
+
+    if not isinstance(add, list) or not isinstance(remove, list):
+        return jsonify({"success": False, "error": "add and remove must be lists"}), 400
+    if not add and not remove:
+        return jsonify({"success": False, "error": "Missing add/remove words"}), 400
+
+    try:
+        results = get_pack_service().bulk_update_words(pack_name, add, remove)
+
+        counts = {}
+        for result in results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+
+        return jsonify({"success": True, "counts": counts, "results": results}), 200
+    except LookupError as e:
+        return jsonify({"success": False, "error": str(e)}), 404
+    except Exception:
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
 @packs_bp.route("/packs/<pack_name>/words/<word>", methods=["DELETE"])
 def delete_word_from_pack(pack_name, word):
     """
@@ -165,7 +329,7 @@ def delete_word_from_pack(pack_name, word):
     }
     """
     try:
-        pack_service.delete_word(pack_name, word)
+        get_pack_service().delete_word(pack_name, word)
         return jsonify({
             "success": True,
             "message": f"Word {word} removed from {pack_name}."
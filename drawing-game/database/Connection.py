@@ -1,25 +1,135 @@
 import os
+import sys
 from pymongo import MongoClient
+from pymongo.monitoring import ConnectionPoolListener
 import certifi
 from dotenv import load_dotenv
 import json
 
 load_dotenv()
 
-class Connection:
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+class PoolStats(ConnectionPoolListener):
+    """Counts connection pool events across every server the shared client talks to."""
 
     def __init__(self):
-        self.__connection = self.__init_conn()
-        self.db = self.__connection["db"]
-        self.packs_collection = self.db["packs"]
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.closed += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures += 1
 
-    def __init_conn(self):
+    def connection_checked_out(self, event):
+        self.checkouts += 1
+        self.checked_out += 1
+        self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+    def snapshot(self, max_pool_size):
+        return {
+            "max_pool_size": max_pool_size,
+            "open": self.created - self.closed,
+            "in_use": self.checked_out,
+            "max_in_use": self.max_checked_out,
+            "utilization": round(self.checked_out / max_pool_size, 4) if max_pool_size else 0.0,
+            "checkouts": self.checkouts,
+            "checkout_failures": self.checkout_failures,
+            "connections_created": self.created,
+            "connections_closed": self.closed,
+            "pool_clears": self.pool_clears,
+        }
+
+# ONE CLIENT (AND POOL) PER PROCESS, SHARED BY EVERY Connection
+_client = None
+_pool_stats = PoolStats()
+
+def client_options():
+    """MongoClient settings, overridable through MONGO_* environment variables."""
+    return {
+        "maxPoolSize": _env_int("MONGO_MAX_POOL_SIZE", 50),
+        "minPoolSize": _env_int("MONGO_MIN_POOL_SIZE", 0),
+        "maxIdleTimeMS": _env_int("MONGO_MAX_IDLE_TIME_MS", 60000),
+        "connectTimeoutMS": _env_int("MONGO_CONNECT_TIMEOUT_MS", 5000),
+        "serverSelectionTimeoutMS": _env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+        "socketTimeoutMS": _env_int("MONGO_SOCKET_TIMEOUT_MS", 10000),
+        "waitQueueTimeoutMS": _env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", 2000),
+        "retryWrites": _env_bool("MONGO_RETRY_WRITES", True),
+        "retryReads": _env_bool("MONGO_RETRY_READS", True),
+    }
+
+def _check_cooperative_io():
+    # Under eventlet, pymongo only yields to other greenlets if its sockets are green.
+    # app.py monkey patches before anything imports pymongo; warn if that ever changes.
+    eventlet = sys.modules.get("eventlet")
+    if eventlet is None:
+        return
+    from eventlet import patcher
+    if not (patcher.is_monkey_patched("socket") and patcher.is_monkey_patched("thread")):
+        print("WARNING: eventlet is loaded but socket/thread are not monkey patched; "
+              "MongoDB calls will block every greenlet.")
+
+def get_client():
+    global _client
+    if _client is None:
+        _check_cooperative_io()
         MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/appdb")
-        return MongoClient(
+        _client = MongoClient(
             MONGO_URI,
             tls=True,
-            tlsCAFile=certifi.where()
+            tlsCAFile=certifi.where(),
+            event_listeners=[_pool_stats],
+            **client_options()
         )
+    return _client
+
+def pool_stats():
+    return _pool_stats.snapshot(client_options()["maxPoolSize"])
+
+class Connection:
+
+    def __init__(self):
+        self.__connection = get_client()
+        self.db = self.__connection["db"]
+        self.packs_collection = self.db["packs"]
 
     def gather_session(self):
         return self.__connection
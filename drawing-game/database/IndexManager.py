@@ -0,0 +1,55 @@
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+
+# collection name -> [(keys, options)]
+INDEXES = {
+    # Every pack lookup/update filters on name; unique also closes the create_pack race.
+    # The summary listing sorts and pages on name, so it uses the same index.
+    "packs": [
+        ([("name", ASCENDING)], {"name": "name_unique", "unique": True}),
+    ],
+}
+
+class IndexManager:
+    def __init__(self, db):
+        self.db = db
+
+    def ensure_indexes(self):
+        """
+        Creates any missing index from INDEXES. Safe to run on every start:
+        create_index is a no-op when an identical index already exists.
+        """
+        for collection_name, indexes in INDEXES.items():
+            collection = self.db[collection_name]
+            for keys, options in indexes:
+                try:
+                    collection.create_index(keys, **options)
+                except OperationFailure as e:
+                    # e.g. duplicate names already stored; the app still works without it
+                    print(f"Could not create index {options['name']} on {collection_name}: {e}")
+
+    def usage_report(self):
+        """
+        Per-index usage since the server last started, from $indexStats:
+        {"packs": [{"name": "name_unique", "key": {"name": 1}, "ops": 42, "since": ..., "in_use": True}, ...]}
+        """
+        report = {}
+        for collection_name, indexes in INDEXES.items():
+            expected = {options["name"] for _, options in indexes}
+            entries = []
+            for stat in self.db[collection_name].aggregate([{"$indexStats": {}}]):
+                ops = stat.get("accesses", {}).get("ops", 0)
+                entries.append({
+                    "name": stat["name"],
+                    "key": dict(stat["key"]),
+                    "ops": ops,
+                    "since": stat.get("accesses", {}).get("since"),
+                    "in_use": ops > 0,
+                })
+                expected.discard(stat["name"])
+
+            for missing in sorted(expected):
+                entries.append({"name": missing, "key": None, "ops": 0, "since": None, "in_use": False, "missing": True})
+
+            report[collection_name] = entries
+        return report
@@ -1,14 +1,36 @@
 from database.Connection import Connection
+from database.IndexManager import IndexManager
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
 import json
 import os
 
 class PackCommander(Connection):
     def __init__(self):
         super().__init__()
+        self.indexes = IndexManager(self.db)
+        self.indexes.ensure_indexes()
         self.seed_default_packs()
 
-    def find_all_packs(self):
-        return list(self.packs_collection.find({}, {"_id": 0}))
+    def iter_all_packs(self, batch_size=20):
+        """Lazy cursor over every pack; documents arrive batch_size at a time."""
+        return self.packs_collection.find({}, {"_id": 0}).sort("name", 1).batch_size(batch_size)
+
+    def find_pack_summaries(self, after=None, limit=50):
+        """Name + word count per pack, ordered by name, starting after the given name."""
+        pipeline = []
+        if after is not None:
+            pipeline.append({"$match": {"name": {"$gt": after}}})
+        pipeline += [
+            {"$sort": {"name": 1}},
+            {"$limit": limit},
+            {"$project": {
+                "_id": 0,
+                "name": 1,
+                "word_count": {"$size": {"$ifNull": ["$words", []]}}
+            }},
+        ]
+        return list(self.packs_collection.aggregate(pipeline))
     
     def find_pack(self, name):
         return self.packs_collection.find_one({"name": name}, {"_id": 0})
@@ -31,12 +53,35 @@ class PackCommander(Connection):
             {"$pull": {"words": word}}
         )
 
+    def bulk_update_words(self, pack_name, add, remove):
+        """
+        Adds and removes many words in one round trip. Existing word order is kept
+        and new words go on the end. Returns the words from add + remove that were
+        in the pack before the update, or None if the pack does not exist.
+        """
+        # $literal: a word like "$words" or "$$ROOT" is text, not a field or variable path
+        add, remove = list(add), list(remove)
+        touched = {"$literal": add + remove}
+        add, remove = {"$literal": add}, {"$literal": remove}
+        before = self.packs_collection.find_one_and_update(
+            {"name": pack_name},
+            [{"$set": {"words": {"$concatArrays": [
+                {"$filter": {"input": "$words", "cond": {"$not": [{"$in": ["$$this", remove]}]}}},
+                {"$filter": {"input": add, "cond": {"$not": [{"$in": ["$$this", "$words"]}]}}},
+            ]}}}],
+            projection={
+                "_id": 0,
+                "present": {"$filter": {"input": "$words", "cond": {"$in": ["$$this", touched]}}}
+            },
+            return_document=ReturnDocument.BEFORE
+        )
+        if before is None:
+            return None
+        return set(before.get("present") or [])
+
     # Seeder
     def seed_default_packs(self):
-        if self.packs_collection.count_documents({}) > 0:
-            print("packs_collection is not empty, skipping seeding...")
-            return
-
+        """Inserts any default pack that is not in the collection yet, in one insert_many."""
         pack_files = [
             "data/animal_pack.json",
             "data/long_pack.json",
@@ -45,6 +90,7 @@ class PackCommander(Connection):
 
         print("Starting seeding process...")
 
+        pack_docs = []
         for file_path in pack_files:
             if not os.path.isfile(file_path):
                 print(f"Pack file path {file_path} not found, skipping...")
@@ -53,13 +99,28 @@ class PackCommander(Connection):
             with open(file_path, "r") as f:
                 data = json.load(f)
 
-            pack_doc = {
+            pack_docs.append({
                 "name": data.get("name"),
                 "words": data.get("words", [])
-            }
+            })
 
-            self.packs_collection.insert_one(pack_doc)
-            print(f"Successfully imported {file_path}.")
+        names = [doc["name"] for doc in pack_docs]
+        existing = {
+            doc["name"]
+            for doc in self.packs_collection.find({"name": {"$in": names}}, {"_id": 0, "name": 1})
+        }
+        missing = [doc for doc in pack_docs if doc["name"] not in existing]
+
+        if not missing:
+            print("All default packs present, skipping seeding...")
+            return
 
-        print("Seeding complete.")
+        try:
+            self.packs_collection.insert_many(missing, ordered=False)
+        except BulkWriteError as e:
+            # Another server process seeded the same pack in the meantime
+            duplicates = [err for err in e.details.get("writeErrors", []) if err.get("code") == 11000]
+            if len(duplicates) != len(e.details.get("writeErrors", [])):
+                raise
 
+        print(f"Seeding complete: {', '.join(doc['name'] for doc in missing)}.")
@@ -0,0 +1,243 @@
+import bisect
+import functools
+import json
+import os
+import time
+from flask import g, request
+
+# METRICS=0 leaves handlers, emits and routes unwrapped
+METRICS_ENABLED = os.getenv("METRICS", "1") != "0"
+
+# Binary payloads are counted exactly; JSON ones are encoded on 1 emit in this
+# many (about 10 us each) and counted this many times over
+BYTES_SAMPLE = max(1, int(os.getenv("METRICS_BYTES_SAMPLE", "16")))
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, *label_values, amount=1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for label_values, value in sorted(self.values.items()):
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {value}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *label_values, value):
+        self.values[label_values] = value
+
+
+class Histogram:
+    """Cumulative buckets rendered the Prometheus way; observe() is one bisect."""
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}  # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, *label_values):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for label_values, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labels + ("le",), label_values + (bound,))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {series[-1]}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help_text, labels=()):
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self._add(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self, extra=()) -> str:
+        """Prometheus text exposition format 0.0.4."""
+        lines = []
+        for metric in list(self.metrics) + list(extra):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+handler_latency = registry.histogram(
+    "socketio_handler_seconds", "Time spent in Socket.IO event handlers", ("event",))
+handler_errors = registry.counter(
+    "socketio_handler_errors_total", "Socket.IO handlers that raised", ("event",))
+emits = registry.counter(
+    "socketio_emits_total", "Events handed to the Socket.IO server", ("event",))
+emit_bytes = registry.counter(
+    "socketio_emit_bytes_total", "Payload bytes handed to the Socket.IO server, once per emit (JSON payloads sampled)", ("event",))
+route_latency = registry.histogram(
+    "http_request_seconds", "Time spent serving HTTP routes", ("route", "method"))
+route_responses = registry.counter(
+    "http_responses_total", "HTTP responses by route and status", ("route", "method", "status"))
+background_tasks = registry.gauge(
+    "background_tasks_active", "Background tasks currently running", ("task",))
+background_started = registry.counter(
+    "background_tasks_started_total", "Background tasks started", ("task",))
+
+
+def binary_size(args):
+    """Total length if every argument is binary, else None. No encoding involved."""
+    size = 0
+    for arg in args:
+        if not isinstance(arg, (bytes, bytearray, memoryview)):
+            return None
+        size += len(arg)
+    return size
+
+
+def payload_size(args) -> int:
+    """Bytes on the wire, near enough: binary as is, everything else as compact JSON."""
+    size = 0
+    for arg in args:
+        if isinstance(arg, (bytes, bytearray, memoryview)):
+            size += len(arg)
+        else:
+            try:
+                size += len(json.dumps(arg, separators=(",", ":"), default=str))
+            except (TypeError, ValueError):
+                pass
+    return size
+
+
+def _task_name(target):
+    return getattr(target, "__qualname__", None) or getattr(target, "__name__", "task")
+
+
+def instrument_socketio(socketio):
+    """
+    Wraps the SocketIO instance in place: handlers registered through
+    socketio.on() are timed, socketio.emit() (which flask_socketio.emit goes
+    through too) is counted, and background tasks are tracked while they run.
+    Call before any handler module is imported.
+    """
+    if not METRICS_ENABLED:
+        return socketio
+
+    register = socketio.on
+
+    def on(message, namespace=None):
+        def decorator(handler):
+            @functools.wraps(handler)
+            def timed(*args):
+                started = time.perf_counter()
+                try:
+                    return handler(*args)
+                except TypeError:
+                    # Flask-SocketIO retries connect/disconnect handlers without
+                    # their optional argument when the first call raises TypeError
+                    if message not in ("connect", "disconnect"):
+                        handler_errors.inc(message)
+                    raise
+                except Exception:
+                    handler_errors.inc(message)
+                    raise
+                finally:
+                    handler_latency.observe(time.perf_counter() - started, message)
+            return register(message, namespace)(timed)
+        return decorator
+
+    send_event = socketio.emit
+    json_emits = [0]
+
+    def emit(event, *args, **kwargs):
+        emits.inc(event)
+        size = binary_size(args)
+        if size is None:
+            json_emits[0] += 1
+            if json_emits[0] % BYTES_SAMPLE == 0:
+                size = payload_size(args) * BYTES_SAMPLE
+        if size:
+            emit_bytes.inc(event, amount=size)
+        return send_event(event, *args, **kwargs)
+
+    start_task = socketio.start_background_task
+
+    def start_background_task(target, *args, **kwargs):
+        name = _task_name(target)
+        background_started.inc(name)
+
+        def tracked(*task_args, **task_kwargs):
+            background_tasks.inc(name)
+            try:
+                return target(*task_args, **task_kwargs)
+            finally:
+                background_tasks.inc(name, amount=-1)
+        return start_task(tracked, *args, **kwargs)
+
+    socketio.on = on
+    socketio.emit = emit
+    socketio.start_background_task = start_background_task
+    return socketio
+
+
+def instrument_app(app):
+    """Times every route, including blueprint ones, by its URL rule."""
+    if not METRICS_ENABLED:
+        return app
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record(response):
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            route_latency.observe(time.perf_counter() - started, route, request.method)
+            route_responses.inc(route, request.method, str(response.status_code))
+        return response
+
+    return app
@@ -1,3 +1,13 @@
+import os
 from flask_socketio import SocketIO
+from extensions.metrics import instrument_socketio
 
-socketio = SocketIO(cors_allowed_origins="*")
+# With several server processes, set SOCKETIO_MESSAGE_QUEUE (e.g. redis://redis:6379/0)
+# so an emit from one process reaches clients connected to the others
+socketio = SocketIO(
+    cors_allowed_origins="*",
+    message_queue=os.getenv("SOCKETIO_MESSAGE_QUEUE")
+)
+
+# Timed handlers and counted emits for /metrics; wraps before any handler registers
+instrument_socketio(socketio)
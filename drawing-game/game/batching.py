@@ -0,0 +1,74 @@
+#  Server-side micro-batching of draw points
+import os
+from array import array
+from extensions.socketio import socketio
+from game.canvas import to_coord
+from game.wire import relay_draw_event
+
+# How long a drawer's points are gathered before one drawBatch frame goes out
+DRAW_BATCH_TICK_SECONDS = float(os.getenv("DRAW_BATCH_TICK_MS", "16")) / 1000
+
+# Process-wide counters, see batching_stats()
+_stats = {
+    "draw_events_in": 0,
+    "batches_out": 0,
+    "frames_saved": 0,
+}
+
+
+def queue_draw_point(game_state, sid, x, y):
+    """
+    Buffers one draw point from the drawer. The first point of a batch schedules
+    a flush one tick later; everything queued until then goes out as one frame.
+    """
+    x, y = to_coord(x), to_coord(y)
+    if x is None or y is None:
+        return False
+
+    _stats["draw_events_in"] += 1
+    game_state.pending_points.append(x)
+    game_state.pending_points.append(y)
+    game_state.pending_sid = sid
+
+    if not game_state.batch_flush_scheduled:
+        game_state.batch_flush_scheduled = True
+        socketio.start_background_task(_flush_after_tick, game_state)
+
+    return True
+
+
+def _flush_after_tick(game_state):
+    socketio.sleep(DRAW_BATCH_TICK_SECONDS)
+    game_state.batch_flush_scheduled = False
+    flush_draw_batch(game_state)
+
+
+def flush_draw_batch(game_state):
+    """
+    Logs pending points as a single history entry and relays them as one drawBatch.
+    Handlers for startPath/dot/fill/endPath/undo/clear call this first to keep ordering.
+    While the drawer's relays are paused the points are only logged.
+    """
+    points = game_state.pending_points
+    if not points:
+        return
+
+    game_state.pending_points = array("H")
+    game_state.canvas_history.add_points(points)
+    if game_state.relay_paused:
+        return
+
+    relay_draw_event(game_state, "drawBatch", game_state.pending_sid, fields=points)
+
+    recipients = max(0, len(game_state.players) - 1)
+    _stats["batches_out"] += 1
+    _stats["frames_saved"] += (len(points) // 2 - 1) * recipients
+
+
+def discard_draw_batch(game_state):
+    """Drops points queued for a round that is over."""
+    game_state.pending_points = array("H")
+
+
+def batching_stats() -> dict:
+    return dict(_stats)
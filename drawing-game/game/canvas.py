@@ -0,0 +1,593 @@
+#  Canvas history storage
+from array import array
+from bisect import bisect_left
+import json
+import math
+import sys
+import zlib
+
+# Op kinds stored in CanvasHistory._kinds
+OP_STROKE = 0
+OP_DOT = 1
+OP_FILL = 2
+
+OP_EVENT_TYPES = {
+    OP_STROKE: "startPath",
+    OP_DOT: "dot",
+    OP_FILL: "fill",
+}
+
+MAX_COORD = 0xFFFF
+
+# Snapshots smaller than this are sent as plain JSON
+SNAPSHOT_COMPRESS_MIN_BYTES = 1024
+
+# Undone actions kept around for redo
+MAX_REDO_ACTIONS = 50
+
+# Per-lobby stroke quality -> simplification tolerance in canvas pixels
+STROKE_QUALITY_TOLERANCE = {
+    "lossless": 0.0,
+    "high": 0.5,
+    "medium": 1.0,
+    "low": 2.0,
+}
+DEFAULT_STROKE_QUALITY = "high"
+
+
+def to_coord(value):
+    """
+    Canvas coordinates are stored as unsigned 16-bit ints.
+    Returns None for anything that is not a number.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if not math.isfinite(value):  # NaN, and the Infinity json.loads accepts
+        return None
+    return min(MAX_COORD, max(0, int(round(value))))
+
+
+def simplify_points(points, tolerance):
+    """
+    Ramer–Douglas–Peucker over flat x, y pairs. Drops points closer than
+    tolerance pixels to the line between the points kept around them.
+    """
+    n = len(points) // 2
+    if tolerance <= 0 or n < 3:
+        return points
+
+    keep = bytearray(n)
+    keep[0] = keep[n - 1] = 1
+    tolerance_sq = tolerance * tolerance
+    stack = [(0, n - 1)]
+
+    while stack:
+        first, last = stack.pop()
+        ax, ay = points[2 * first], points[2 * first + 1]
+        dx, dy = points[2 * last] - ax, points[2 * last + 1] - ay
+        seg_sq = dx * dx + dy * dy
+
+        max_dist, max_idx = -1.0, -1
+        for i in range(first + 1, last):
+            px, py = points[2 * i] - ax, points[2 * i + 1] - ay
+            if seg_sq == 0:
+                dist = px * px + py * py
+            else:
+                cross = px * dy - py * dx
+                dist = cross * cross / seg_sq
+            if dist > max_dist:
+                max_dist, max_idx = dist, i
+
+        if max_dist > tolerance_sq:
+            keep[max_idx] = 1
+            stack.append((first, max_idx))
+            stack.append((max_idx, last))
+
+    simplified = array("H")
+    for i in range(n):
+        if keep[i]:
+            simplified.append(points[2 * i])
+            simplified.append(points[2 * i + 1])
+    return simplified
+
+
+def encode_deltas(points, out):
+    """
+    Appends flat x, y pairs to out as zigzag varints of the delta from the
+    previous point (the first point is relative to 0, 0). Neighboring mouse
+    samples are a few pixels apart, so most coordinates take one byte.
+    """
+    prev_x = prev_y = 0
+    for i in range(0, len(points), 2):
+        x, y = points[i], points[i + 1]
+        for delta in (x - prev_x, y - prev_y):
+            zigzag = delta * 2 if delta >= 0 else -delta * 2 - 1
+            while zigzag >= 0x80:
+                out.append((zigzag & 0x7F) | 0x80)
+                zigzag >>= 7
+            out.append(zigzag)
+        prev_x, prev_y = x, y
+
+
+def decode_deltas(buf):
+    """Inverse of encode_deltas(); returns absolute points as array('H')."""
+    points = array("H")
+    value = shift = 0
+    prev = [0, 0]
+
+    for byte in buf:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+
+        delta = value >> 1 if not value & 1 else -(value >> 1) - 1
+        axis = len(points) & 1
+        prev[axis] += delta
+        points.append(prev[axis])
+        value = shift = 0
+
+    return points
+
+
+def delta_list(points):
+    """[x0, y0, x1, y1, ...] -> [x0, y0, x1 - x0, y1 - y0, ...] for the wire."""
+    out = points.tolist()
+    for i in range(len(out) - 1, 1, -1):
+        out[i] -= out[i - 2]
+    return out
+
+
+def pack_ops(ops):
+    """
+    Turns (kind, (color, size, tool), points) tuples into the wire layout shared by
+    canvasSnapshot and restoreStroke:
+    {"styles": [[color, size, tool], ...], "ops": [[kind, style, [x0, y0, dx1, dy1, ...]], ...]}
+    Points after the first are deltas from the previous point.
+    """
+    styles = []
+    style_remap = {}
+    packed = []
+
+    for kind, style, points in ops:
+        local_idx = style_remap.get(style)
+        if local_idx is None:
+            local_idx = style_remap[style] = len(styles)
+            styles.append(list(style))
+        packed.append([kind, local_idx, delta_list(points)])
+
+    return {"styles": styles, "ops": packed}
+
+
+def _array_bytes(values) -> bytes:
+    """array -> little-endian bytes, so stored documents do not depend on the host."""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _bytes_array(typecode, data):
+    values = array(typecode, bytes(data or b""))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class CanvasHistory:
+    """
+    Compact, array-backed history of one lobby's canvas.
+
+    Every logged operation (a stroke opened by startPath, a dot or a fill) is one op.
+    Style (color, size, tool) is interned once per op instead of once per point.
+    The newest op keeps its points in a flat array('H') of x, y pairs while it can
+    still grow. Once the next op starts (or the stroke ends) it is sealed: strokes are
+    simplified to the lobby's tolerance and all points are appended to one bytearray
+    as delta-encoded varints.
+
+    Ops are grouped into undoable actions. The client fires a "click" after every
+    mouseup, so a stroke or fill is followed by a dot; that dot belongs to the
+    same action and undo removes both together.
+
+    Iterating yields the same (event_type, payload) tuples the old list held,
+    so replay code does not need to know about the packed layout.
+    """
+
+    def __init__(self, tolerance=0.0):
+        # Simplification tolerance in pixels; 0 keeps every point
+        self.tolerance = tolerance
+
+        self._kinds = array("B")
+        self._styles = array("I")
+        self._counts = array("I")
+
+        # Sealed ops: byte offset of each into _packed
+        self._offsets = array("I")
+        self._packed = bytearray()
+
+        # Points of the newest op until it is sealed
+        self._open = None
+
+        # First op index of every action
+        self._action_starts = array("I")
+        self._redo = []
+
+        self._style_table = []
+        self._style_index = {}
+
+        self._event_count = 0
+
+        # Bumped on every mutation; keys the cached snapshot
+        self.version = 0
+        self._snapshot_cache = None
+
+        # Bumped whenever ops are removed; in-flight checkpoint builds compare against it
+        self.epoch = 0
+
+        # Raster of ops [0, checkpoint_op) as PNG bytes, see game/checkpoints.py
+        self.checkpoint_op = 0
+        self.checkpoint_png = None
+        self.checkpoint_size = None
+
+    # ---------- writes ----------
+
+    def append(self, event_type, data=None):
+        """
+        Logs one socket event. Returns False if the event was not stored
+        (unknown type, bad coordinates or a draw without an open stroke).
+        """
+        if not isinstance(data, dict):
+            data = {}
+
+        if event_type == "draw":
+            return self.add_point(data.get("x"), data.get("y"))
+        if event_type == "startPath":
+            return self.start_stroke(data.get("x"), data.get("y"), data.get("size"), data.get("color"), data.get("tool"))
+        if event_type == "dot":
+            return self.add_dot(data.get("x"), data.get("y"), data.get("size"), data.get("color"), data.get("tool"))
+        if event_type == "fill":
+            return self.add_fill(data.get("x"), data.get("y"), data.get("color"))
+        return False
+
+    def start_stroke(self, x, y, size, color, tool):
+        return self._push_op(OP_STROKE, (color, size, tool), x, y)
+
+    def add_dot(self, x, y, size, color, tool):
+        return self._push_op(OP_DOT, (color, size, tool), x, y)
+
+    def add_fill(self, x, y, color):
+        return self._push_op(OP_FILL, (color, None, None), x, y)
+
+    def _has_open_stroke(self):
+        return self._open is not None and self._kinds[-1] == OP_STROKE
+
+    def add_point(self, x, y):
+        """Extends the currently open stroke by one point."""
+        if not self._has_open_stroke():
+            return False
+
+        x, y = to_coord(x), to_coord(y)
+        if x is None or y is None:
+            return False
+
+        self._open.append(x)
+        self._open.append(y)
+        self._counts[-1] += 1
+        self._event_count += 1
+        self.version += 1
+        return True
+
+    def add_points(self, points):
+        """
+        Extends the open stroke with a whole batch of already-validated points
+        (flat x, y pairs) as a single history entry.
+        """
+        if not points or not self._has_open_stroke():
+            return False
+
+        self._open.extend(points)
+        self._counts[-1] += len(points) // 2
+        self._event_count += len(points) // 2
+        self.version += 1
+        return True
+
+    def end_stroke(self):
+        """endPath: the open stroke is finished, so simplify and pack it now."""
+        if self._has_open_stroke():
+            self._seal()
+
+    def _seal(self):
+        points = self._open
+        if points is None:
+            return
+
+        if self._kinds[-1] == OP_STROKE and self.tolerance > 0:
+            points = simplify_points(points, self.tolerance)
+            dropped = self._counts[-1] - len(points) // 2
+            self._counts[-1] -= dropped
+            self._event_count -= dropped
+
+        self._offsets.append(len(self._packed))
+        encode_deltas(points, self._packed)
+        self._open = None
+        self.version += 1
+
+    def pop_op(self):
+        """
+        Removes the most recent op (a whole stroke with all of its points, a dot or a fill).
+        Returns the removed (kind, style, points) tuple, or None if history is empty.
+        """
+        if not self._kinds:
+            return None
+
+        removed = self._op_tuple(len(self._kinds) - 1)
+
+        if self._open is not None:
+            self._open = None
+        else:
+            del self._packed[self._offsets.pop():]
+
+        self._kinds.pop()
+        self._styles.pop()
+        self._event_count -= self._counts.pop()
+
+        if self._action_starts and self._action_starts[-1] >= len(self._kinds):
+            self._action_starts.pop()
+
+        self.version += 1
+        self.epoch += 1
+
+        # Checkpoint covered the removed op
+        if self.checkpoint_op > len(self._kinds):
+            self.drop_checkpoint()
+
+        return removed
+
+    def undo_action(self):
+        """
+        Removes the most recent action and keeps it for redo.
+        Returns its ops as (kind, style, points) tuples, or None if there is nothing to undo.
+        """
+        if not self._action_starts:
+            return None
+
+        first = self._action_starts[-1]
+        ops = [self.pop_op() for _ in range(len(self._kinds) - first)]
+        ops.reverse()
+
+        self._redo.append(ops)
+        del self._redo[:-MAX_REDO_ACTIONS]
+        return ops
+
+    def redo_action(self):
+        """Re-applies the most recently undone action. Returns its ops, or None."""
+        if not self._redo:
+            return None
+
+        ops = self._redo.pop()
+        for kind, style, points in ops:
+            self._push_op(kind, style, points[0], points[1], keep_redo=True)
+            self.add_points(points[2:])
+        return ops
+
+    def clear(self):
+        version, epoch = self.version, self.epoch
+        self.__init__(self.tolerance)
+        self.version = version + 1
+        self.epoch = epoch + 1
+
+    def _intern_style(self, style):
+        idx = self._style_index.get(style)
+        if idx is None:
+            idx = len(self._style_table)
+            self._style_table.append(style)
+            self._style_index[style] = idx
+        return idx
+
+    def _joins_previous_action(self, kind):
+        """A dot straight after a lone stroke or fill is that action's trailing click."""
+        if kind != OP_DOT or not self._action_starts:
+            return False
+        first = self._action_starts[-1]
+        return len(self._kinds) - first == 1 and self._kinds[first] in (OP_STROKE, OP_FILL)
+
+    def _push_op(self, kind, style, x, y, keep_redo=False):
+        x, y = to_coord(x), to_coord(y)
+        if x is None or y is None:
+            return False
+
+        try:
+            style_idx = self._intern_style(style)
+        except TypeError:
+            # Unhashable color/size/tool from a bad client
+            return False
+
+        if not self._joins_previous_action(kind):
+            self._action_starts.append(len(self._kinds))
+
+        # New drawing invalidates anything that was undone
+        if not keep_redo:
+            self._redo.clear()
+
+        self._seal()
+        self._kinds.append(kind)
+        self._styles.append(style_idx)
+        self._counts.append(1)
+        self._open = array("H", (x, y))
+        self._event_count += 1
+        self.version += 1
+        return True
+
+    # ---------- reads ----------
+
+    def __len__(self):
+        """Number of logged events, counting each draw point of a stroke."""
+        return self._event_count
+
+    def __bool__(self):
+        return bool(self._kinds)
+
+    @property
+    def op_count(self):
+        return len(self._kinds)
+
+    @property
+    def action_count(self):
+        return len(self._action_starts)
+
+    def _op_tuple(self, index):
+        if index == len(self._kinds) - 1 and self._open is not None:
+            points = array("H", self._open)
+        else:
+            start = self._offsets[index]
+            end = self._offsets[index + 1] if index + 1 < len(self._offsets) else len(self._packed)
+            points = decode_deltas(memoryview(self._packed)[start:end])
+        return self._kinds[index], self._style_table[self._styles[index]], points
+
+    def op(self, index):
+        """
+        Returns (event_type, (color, size, tool), points) for one op,
+        where points is a flat array('H') of x, y pairs.
+        """
+        kind, style, points = self._op_tuple(index)
+        return OP_EVENT_TYPES[kind], style, points
+
+    def iter_ops(self, start=0):
+        for i in range(start, len(self._kinds)):
+            yield self.op(i)
+
+    def __iter__(self):
+        for event_type, (color, size, tool), points in self.iter_ops():
+            x, y = points[0], points[1]
+
+            if event_type == "fill":
+                yield event_type, {"x": x, "y": y, "color": color}
+                continue
+
+            yield event_type, {"x": x, "y": y, "size": size, "color": color, "tool": tool}
+
+            if event_type == "startPath":
+                for i in range(2, len(points), 2):
+                    yield "draw", {"x": points[i], "y": points[i + 1]}
+
+    def nbytes(self):
+        """Approximate bytes held by the packed arrays (style table excluded)."""
+        arrays = [self._kinds, self._styles, self._counts, self._offsets, self._action_starts]
+        if self._open is not None:
+            arrays.append(self._open)
+        return len(self._packed) + sum(a.itemsize * len(a) for a in arrays)
+
+    # ---------- checkpoints ----------
+
+    @property
+    def closed_op_count(self):
+        """
+        Ops in actions that can no longer change. The newest action may still be
+        a stroke receiving points or waiting for its trailing dot.
+        """
+        return self._action_starts[-1] if self._action_starts else 0
+
+    def events_since_checkpoint(self):
+        return sum(self._counts[self.checkpoint_op:])
+
+    def set_checkpoint(self, op_index, png, size, epoch):
+        """
+        Stores a raster of ops [0, op_index). Rejected if ops were removed
+        since the build started (epoch changed) or the ops no longer exist.
+        """
+        if epoch != self.epoch or op_index > len(self._kinds) or op_index <= self.checkpoint_op:
+            return False
+
+        self.checkpoint_op = op_index
+        self.checkpoint_png = png
+        self.checkpoint_size = size
+        return True
+
+    def drop_checkpoint(self):
+        self.checkpoint_op = 0
+        self.checkpoint_png = None
+        self.checkpoint_size = None
+
+    # ---------- shared-store documents ----------
+
+    def to_document(self) -> dict:
+        """
+        Plain dict of the packed arrays, for a lobby store shared between processes.
+        Redo entries and checkpoints stay local to the process that built them.
+        """
+        return {
+            "tolerance": self.tolerance,
+            "version": self.version,
+            "events": self._event_count,
+            "styles": [list(style) for style in self._style_table],
+            "kinds": _array_bytes(self._kinds),
+            "style_ids": _array_bytes(self._styles),
+            "counts": _array_bytes(self._counts),
+            "offsets": _array_bytes(self._offsets),
+            "packed": bytes(self._packed),
+            "open": _array_bytes(self._open) if self._open is not None else None,
+            "action_starts": _array_bytes(self._action_starts),
+        }
+
+    @classmethod
+    def from_document(cls, doc):
+        history = cls(doc.get("tolerance", 0.0))
+        history.version = doc.get("version", 0)
+        history._event_count = doc.get("events", 0)
+
+        for style in doc.get("styles", []):
+            history._intern_style(tuple(style))
+
+        history._kinds = _bytes_array("B", doc.get("kinds"))
+        history._styles = _bytes_array("I", doc.get("style_ids"))
+        history._counts = _bytes_array("I", doc.get("counts"))
+        history._offsets = _bytes_array("I", doc.get("offsets"))
+        history._packed = bytearray(doc.get("packed") or b"")
+        history._action_starts = _bytes_array("I", doc.get("action_starts"))
+
+        if doc.get("open") is not None:
+            history._open = _bytes_array("H", doc["open"])
+
+        return history
+
+    # ---------- snapshots ----------
+
+    def encode_snapshot(self, start_op=None):
+        """
+        Packs the canvas into one canvasSnapshot payload:
+        {
+            "encoding": "deflate" | "json",
+            "events": <events covered by ops>,
+            "actions": <total undoable actions>,
+            "baseActions": <actions baked into the checkpoint>,
+            "data": zlib bytes or JSON text of pack_ops() output,
+            "checkpoint": PNG bytes of every op before the first one in "data" (optional)
+        }
+        By default replay starts at the latest checkpoint, so its cost stays bounded.
+        The result is cached until the next mutation, so many joiners cost one encode.
+        """
+        use_checkpoint = start_op is None and self.checkpoint_png is not None
+        if start_op is None:
+            start_op = self.checkpoint_op if use_checkpoint else 0
+
+        key = (self.version, start_op, use_checkpoint)
+        if self._snapshot_cache is not None and self._snapshot_cache[0] == key:
+            return self._snapshot_cache[1]
+
+        ops = [self._op_tuple(i) for i in range(start_op, len(self._kinds))]
+        events = sum(len(points) // 2 for _, _, points in ops)
+        raw = json.dumps(pack_ops(ops), separators=(",", ":"))
+
+        if len(raw) >= SNAPSHOT_COMPRESS_MIN_BYTES:
+            payload = {"encoding": "deflate", "events": events, "data": zlib.compress(raw.encode("utf-8"))}
+        else:
+            payload = {"encoding": "json", "events": events, "data": raw}
+
+        payload["actions"] = len(self._action_starts)
+        payload["baseActions"] = bisect_left(self._action_starts, start_op)
+
+        if use_checkpoint:
+            payload["checkpoint"] = self.checkpoint_png
+
+        self._snapshot_cache = (key, payload)
+        return payload
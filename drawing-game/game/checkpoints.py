@@ -0,0 +1,66 @@
+#  Background raster checkpoints of the canvas
+from extensions.socketio import socketio
+from game.raster import CanvasRaster, DEFAULT_CANVAS_SIZE
+
+# Checkpoint once this many logged events sit after the latest checkpoint
+CHECKPOINT_INTERVAL_EVENTS = 400
+
+
+def drawer_canvas_size(game_state):
+    drawer_sid = game_state.current_round["drawer"]
+    player = game_state.players.get(drawer_sid) or {}
+    return player.get("canvas_size", DEFAULT_CANVAS_SIZE)
+
+
+def maybe_checkpoint(game_state):
+    """
+    Called after an op boundary (startPath, dot, fill). Starts a background build
+    when enough closed ops have piled up since the last checkpoint.
+    """
+    history = game_state.canvas_history
+
+    if game_state.checkpoint_building:
+        return
+    if history.closed_op_count <= history.checkpoint_op:
+        return
+    if history.events_since_checkpoint() < CHECKPOINT_INTERVAL_EVENTS:
+        return
+
+    game_state.checkpoint_building = True
+    socketio.start_background_task(
+        build_checkpoint,
+        game_state,
+        history,
+        history.closed_op_count,
+        history.epoch
+    )
+
+
+def build_checkpoint(game_state, history, target_op, epoch):
+    """
+    Advances the latest checkpoint to cover ops [0, target_op).
+    Yields to other greenlets between ops; gives up if ops get removed meanwhile.
+    """
+    try:
+        size = drawer_canvas_size(game_state)
+
+        if history.checkpoint_png is not None and history.checkpoint_size == size:
+            base_op = history.checkpoint_op
+            raster = CanvasRaster.from_png(history.checkpoint_png, yield_fn=socketio.sleep)
+        else:
+            base_op = 0
+            raster = CanvasRaster(size[0], size[1], yield_fn=socketio.sleep)
+
+        # Copy the ops up front; the drawer keeps appending while we paint
+        ops = [history.op(i) for i in range(base_op, target_op)]
+
+        for event_type, style, points in ops:
+            raster.apply(event_type, style, points)
+            socketio.sleep(0)
+
+            if history.epoch != epoch:
+                return
+
+        history.set_checkpoint(target_op, raster.to_png(), size, epoch)
+    finally:
+        game_state.checkpoint_building = False
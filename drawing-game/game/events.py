@@ -1,9 +1,9 @@
 from flask import request
-from flask_socketio import emit
+from flask_socketio import emit, join_room, leave_room
 from extensions.socketio import socketio
 import time
 
-from game.state import game_state
+from game.state import lobbies
 
 from game.helpers import (
     build_masked_word,
@@ -11,14 +11,75 @@ from game.helpers import (
 )
 
 from game.manager import (
-    start_new_round,
-    reset_lobby
+    PHASE_COUNTDOWN,
+    PHASE_DRAWING,
+    start_game,
+    reset_lobby,
+    end_round,
+    drawer_left,
+    watch_rounds
 )
 
 from game.reveal import (
     reveal_random_letters
 )
 
+from game.guessing import (
+    GUESS_CORRECT,
+    GUESS_CLOSE,
+    matcher_for
+)
+
+from game.canvas import pack_ops
+from game.checkpoints import maybe_checkpoint
+from game.batching import (
+    queue_draw_point,
+    flush_draw_batch,
+    discard_draw_batch
+)
+from game.raster import clamp_canvas_size
+from game.wire import (
+    binary_room,
+    json_room,
+    decode_frame,
+    relay_draw_event
+)
+from game.scoreboard import (
+    send_scoreboard,
+    player_joined,
+    player_left,
+    score_changed,
+    flush_scores
+)
+from game.rooms import (
+    place_player,
+    drawer_room,
+    guessing_room,
+    solved_room
+)
+from game.ratelimit import limiter, rate_limited, relay_allowed
+
+
+# A process that missed a round change elsewhere re-reads the lobby at most this often
+DRAWER_RESYNC_SECONDS = 0.5
+
+
+def drawer_lobby(sid):
+    """
+    The sid's lobby if sid is its current drawer, else None. With a shared store
+    the round may have moved on in another process since the last sync, so a
+    failed check re-reads the lobby (rate limited) and tries once more.
+    """
+    game_state = lobbies.for_sid(sid)
+    if game_state is None:
+        return None
+
+    if sid != game_state.current_round["drawer"] and lobbies.store.shared:
+        if time.monotonic() - game_state.synced_at >= DRAWER_RESYNC_SECONDS:
+            lobbies.sync(game_state)
+
+    return game_state if sid == game_state.current_round["drawer"] else None
+
 
 @socketio.on("join")
 def handle_join(data):
@@ -30,31 +91,60 @@ def handle_join(data):
     if not name or not avatar:
         return
 
+    # Already seated in a lobby on this connection
+    if lobbies.for_sid(sid) is not None:
+        return
+
+    lobby_id = lobbies.normalize_id(data.get("lobby"))
+    game_state = lobbies.sync(lobbies.get_or_create(lobby_id, data.get("quality"), data.get("pack")), with_canvas=True)
+    watch_rounds()
+    lobbies.bind(sid, lobby_id)
+    join_room(lobby_id)
+
+    # Drawing events go out per wire format; everything else stays on the lobby room
+    binary = data.get("binary") is True
+    if binary:
+        game_state.binary_sids.add(sid)
+        join_room(binary_room(lobby_id))
+    else:
+        join_room(json_room(lobby_id))
+    emit("wireFormat", {"binary": binary}, room=sid)
+
     game_state.players[sid] = {
         "client_id": client_id,
         "name": name,
         "avatar": avatar,
-        "score": 0
+        "score": 0,
+        # Stored with the player so every process counts both wire formats, see game/wire.py
+        "binary": binary
     }
 
     game_state.players_order.append(sid)
+    lobbies.store.add_player(game_state, sid)
+    place_player(game_state, sid)
 
-    print(f"{name} joined with SID {sid}")
-    print("Current players order:", game_state.players_order)
+    # Everyone else gets playerJoined, the new player a full scoreboardSync
+    player_joined(game_state, sid)
 
-    # Sync late joiners
-    if game_state.current_round["active"]:
-        ROUND_TIME = 100
+    emit("packChanged", {"pack": game_state.CURRENT_PACK}, room=sid)
+
+    print(f"{name} joined lobby {lobby_id} with SID {sid}")
+    print("Current players order:", game_state.players_order)
 
-        elapsed = int(time.time() - game_state.current_round["time_started"])
-        remaining = max(0, ROUND_TIME - elapsed)
+    # Late joiner during the countdown: same screen as everyone else, roundStarted follows
+    if game_state.current_round["phase"] == PHASE_COUNTDOWN:
+        emit("roundStarting", {}, room=sid)
+        return
 
+    # Sync late joiners
+    if game_state.current_round["phase"] == PHASE_DRAWING:
         drawer_sid = game_state.current_round["drawer"]
         prompt = game_state.current_round["prompt"]
 
         emit("roundStarted", {
             "role": "drawer" if sid == drawer_sid else "guesser",
-            "startTime": game_state.current_round["time_started"]
+            "startTime": game_state.current_round["time_started"],
+            "duration": game_state.ROUND_TOTAL_SECONDS
         }, room=sid)
 
         if sid == drawer_sid:
@@ -75,17 +165,9 @@ def handle_join(data):
                     "mask": masked
                 }, room=sid)
 
-        for event_type, payload in game_state.canvas_history:
-            emit(event_type, payload, room=sid)
-
-        emit("playerList", [
-            {
-                "name": p["name"],
-                "avatar": p["avatar"],
-                "score": p["score"]
-            }
-            for p in game_state.players.values()
-        ], broadcast=True)
+        # Whole canvas in one frame; the client replays it locally
+        if game_state.canvas_history:
+            emit("canvasSnapshot", game_state.canvas_history.encode_snapshot(), room=sid)
 
         return
 
@@ -97,23 +179,31 @@ def handle_join(data):
         return
 
     # Second player -> start the first round
-    if len(game_state.players_order) == 2:
-        game_state.current_drawer_index = 0
-        start_new_round()
-
-    emit("playerList", [
-        {
-            "name": p["name"],
-            "avatar": p["avatar"],
-            "score": p["score"]
-        }
-        for p in game_state.players.values()
-    ], broadcast=True)
+    start_game(game_state)
 
 
 @socketio.on("disconnect")
 def handle_disconnect():
     sid = request.sid
+    limiter.forget(sid)
+    game_state = lobbies.unbind(sid)
+    if game_state is None:
+        return
+
+    leave_lobby(game_state, sid)
+
+    # Players on other processes keep the lobby going there; this process lets go of it
+    if lobbies.get(game_state.lobby_id) is game_state and not lobbies.local_sids(game_state):
+        flush_scores(game_state)
+        lobbies.drop(game_state.lobby_id)
+
+
+def leave_lobby(game_state, sid):
+    lobbies.sync(game_state)
+    leave_room(game_state.lobby_id)
+    leave_room(binary_room(game_state.lobby_id))
+    leave_room(json_room(game_state.lobby_id))
+    game_state.binary_sids.discard(sid)
 
     if sid in game_state.players:
         name = game_state.players[sid]["name"]
@@ -129,59 +219,35 @@ def handle_disconnect():
             if game_state.current_drawer_index >= len(game_state.players_order) and game_state.players_order:
                 game_state.current_drawer_index = 0
 
-        del game_state.players[sid]
+        player = game_state.players.pop(sid)
+        lobbies.store.remove_player(game_state, sid)
+
+        print(f"{name} left lobby {game_state.lobby_id}. Remaining players: {len(game_state.players)}")
 
-        print(f"{name} left. Remaining players: {len(game_state.players)}")
+        # Last player out closes the lobby
+        if not game_state.players:
+            lobbies.remove(game_state.lobby_id)
+            return
 
         # Left game
         emit("chatMessage", {
             "type": "leave",
             "message": f"{name} left the game.",
             "sender_zone": 2
-        }, broadcast=True)
+        }, room=game_state.lobby_id)
 
         # Update player list
-        emit("playerList", [
-            {
-                "name": p["name"],
-                "avatar": p["avatar"],
-                "score": p["score"]
-            }
-            for p in game_state.players.values()
-        ], broadcast=True)
-
-        # If the drawer left mid-round, auto-advance
-        if game_state.current_round["active"] and sid == game_state.current_round["drawer"]:
-            print("Drawer left mid-round. Advancing to next player.")
-
-            # Reveal the word
-            emit("chatMessage", {
-                "type": "reveal",
-                "word": game_state.current_round["prompt"],
-                "sender_zone": 2
-            }, broadcast=True)
-
-            # Fix drawer index if needed
-            if game_state.players_order:
-                game_state.current_drawer_index = game_state.current_drawer_index % len(game_state.players_order)
-            else:
-                game_state.current_drawer_index = 0
-
-            game_state.current_round["active"] = False
-
-            # Start next round
-            start_new_round()
-            return
+        player_left(game_state, player)
 
-        # Lobby reset logic
+        # Lobby reset logic (checked first: a lone player cannot be handed the turn)
         if len(game_state.players_order) == 1:
-            if game_state.current_round["active"] and game_state.current_round["prompt"]:
+            if game_state.current_round["phase"] == PHASE_DRAWING and game_state.current_round["prompt"]:
                 emit("chatMessage", {
                     "type": "reveal",
                     "word": game_state.current_round["prompt"],
                     "sender_zone": 2
-                }, broadcast=True)
-            reset_lobby()
+                }, room=game_state.lobby_id)
+            reset_lobby(game_state)
 
             remaining_sid = game_state.players_order[0]
             emit("waitingForPlayers", {
@@ -190,171 +256,333 @@ def handle_disconnect():
 
             return
 
+        # If the drawer left mid-round (or mid-countdown), auto-advance
+        if sid == game_state.current_round["drawer"]:
+            if drawer_left(game_state):
+                print("Drawer left mid-round. Advancing to next player.")
+            return
+
+
+@socketio.on("setPack")
+@rate_limited("setPack")
+def handle_set_pack(data):
+    game_state = lobbies.for_sid(request.sid)
+    if game_state is None or request.sid not in game_state.players:
+        return
+
+    pack_name = data.get("pack") if isinstance(data, dict) else None
+    if not isinstance(pack_name, str) or not pack_name:
+        return
+
+    # Takes effect from the next prompt drawn
+    try:
+        game_state.set_pack(pack_name)
+    except LookupError as e:
+        emit("packError", {"error": str(e)}, room=request.sid)
+        return
+
+    lobbies.store.save_pack(game_state)
+    emit("packChanged", {"pack": game_state.CURRENT_PACK}, room=game_state.lobby_id)
+
+
+@socketio.on("canvasSize")
+def handle_canvas_size(data):
+    game_state = lobbies.for_sid(request.sid)
+    if game_state is None or request.sid not in game_state.players:
+        return
+
+    # Used to rasterize checkpoints at the drawer's resolution
+    game_state.players[request.sid]["canvas_size"] = clamp_canvas_size(data.get("width"), data.get("height"))
+    lobbies.store.save_player(game_state, request.sid)
+
 
 @socketio.on("startPath")
 def handle_start_path(data):
-    if request.sid == game_state.current_round["drawer"]:
-        log_event("startPath", data)
-        emit("startPath", data, broadcast=True, include_self=False)
+    game_state = drawer_lobby(request.sid)
+    if game_state is None:
+        return
+
+    flush_draw_batch(game_state)
+    log_event(game_state, "startPath", data)
+    maybe_checkpoint(game_state)
+    if relay_allowed(game_state, "startPath", resync_lobby):
+        relay_draw_event(game_state, "startPath", request.sid, payload=data)
 
 
 @socketio.on("draw")
 def handle_draw(data):
-    if request.sid == game_state.current_round["drawer"]:
-        log_event("draw", data)
-        emit("draw", data, broadcast=True, include_self=False)
+    if not isinstance(data, dict):
+        return
+
+    game_state = drawer_lobby(request.sid)
+    if game_state is None:
+        return
+
+    # Relayed and logged in batches, see game/batching.py
+    queue_draw_point(game_state, request.sid, data.get("x"), data.get("y"))
 
 
 @socketio.on("dot")
 def handle_dot(data):
-    if request.sid == game_state.current_round["drawer"]:
-        log_event("dot", data)
-        emit("dot", data, broadcast=True, include_self=False)
+    game_state = drawer_lobby(request.sid)
+    if game_state is None:
+        return
+
+    flush_draw_batch(game_state)
+    log_event(game_state, "dot", data)
+    maybe_checkpoint(game_state)
+    lobbies.canvas_changed(game_state)
+    if relay_allowed(game_state, "dot", resync_lobby):
+        relay_draw_event(game_state, "dot", request.sid, payload=data)
 
 
 @socketio.on("endPath")
 def handle_end_path():
-    if request.sid == game_state.current_round["drawer"]:
-        emit("endPath", {}, broadcast=True, include_self=False)
+    game_state = drawer_lobby(request.sid)
+    if game_state is None:
+        return
+
+    flush_draw_batch(game_state)
+    game_state.canvas_history.end_stroke()
+    lobbies.canvas_changed(game_state)
+    if relay_allowed(game_state, "endPath", resync_lobby):
+        relay_draw_event(game_state, "endPath", request.sid, payload={})
 
 
 @socketio.on("fill")
 def handle_fill(data):
-    if request.sid == game_state.current_round["drawer"]:
-        log_event("fill", data)
-        emit("fill", data, broadcast=True, include_self=False)
+    game_state = drawer_lobby(request.sid)
+    if game_state is None:
+        return
+
+    flush_draw_batch(game_state)
+    log_event(game_state, "fill", data)
+    maybe_checkpoint(game_state)
+    lobbies.canvas_changed(game_state)
+    if relay_allowed(game_state, "fill", resync_lobby):
+        relay_draw_event(game_state, "fill", request.sid, payload=data)
+
+
+@socketio.on("drawBin")
+def handle_draw_bin(frame):
+    game_state = drawer_lobby(request.sid)
+    if game_state is None:
+        return
+
+    try:
+        event_type, fields = decode_frame(frame)
+    except ValueError:
+        return
+
+    history = game_state.canvas_history
+
+    # Same bookkeeping as the JSON handlers above, minus building any dicts
+    if event_type == "draw":
+        queue_draw_point(game_state, request.sid, *fields)
+        return
+
+    flush_draw_batch(game_state)
+
+    if event_type == "startPath":
+        history.start_stroke(*fields)
+    elif event_type == "dot":
+        history.add_dot(*fields)
+    elif event_type == "fill":
+        history.add_fill(*fields)
+    elif event_type == "drawBatch":
+        history.add_points(fields)
+    elif event_type == "endPath":
+        history.end_stroke()
+
+    if event_type in ("startPath", "dot", "fill"):
+        maybe_checkpoint(game_state)
+    if event_type in ("dot", "fill", "endPath"):
+        lobbies.canvas_changed(game_state)
+
+    if relay_allowed(game_state, "drawBin", resync_lobby):
+        relay_draw_event(game_state, event_type, request.sid, frame=bytes(frame), fields=fields)
 
 
 @socketio.on("undo")
+@rate_limited("undo")
 def handle_undo():
-    if request.sid != game_state.current_round["drawer"]:
+    game_state = drawer_lobby(request.sid)
+    if game_state is None:
         return
 
-    # Helper to remove ONE complete operation
-    def pop_one_action():
-        if not game_state.canvas_history:
-            return
-        while game_state.canvas_history:
-            event_type, _ = game_state.canvas_history.pop()
-            if event_type in ("startPath", "dot", "fill"):
-                break
+    flush_draw_batch(game_state)
+
+    # Remove exactly one action (a stroke/fill plus its trailing click dot)
+    if game_state.canvas_history.undo_action() is None:
+        return
+    lobbies.canvas_changed(game_state)
+
+    # Clients drop their last action and redraw locally; they ask for "resync" if out of step
+    emit("removeStroke", {
+        "actions": game_state.canvas_history.action_count
+    }, room=game_state.lobby_id)
+
+
+@socketio.on("redo")
+@rate_limited("redo")
+def handle_redo():
+    game_state = drawer_lobby(request.sid)
+    if game_state is None:
+        return
+
+    flush_draw_batch(game_state)
+
+    ops = game_state.canvas_history.redo_action()
+    if ops is None:
+        return
+    lobbies.canvas_changed(game_state)
+
+    payload = pack_ops(ops)
+    payload["actions"] = game_state.canvas_history.action_count
+    emit("restoreStroke", payload, room=game_state.lobby_id)
+
+
+def resend_scoreboard(sid):
+    game_state = lobbies.for_sid(sid)
+    if game_state is not None:
+        send_scoreboard(game_state, sid)
+
 
-    # Pop TWO full actions instead of one, temp fix undo bug?
-    pop_one_action()
-    pop_one_action()
+def resend_canvas(sid):
+    game_state = lobbies.for_sid(sid)
+    if game_state is None:
+        return
+
+    lobbies.sync(game_state, with_canvas=True)
+    flush_draw_batch(game_state)
+    socketio.emit("canvasSnapshot", game_state.canvas_history.encode_snapshot(), room=sid)
+
+
+def resync_lobby(game_state):
+    """Snapshot for everyone but the drawer, after their relays were paused."""
+    if lobbies.lobbies.get(game_state.lobby_id) is not game_state:
+        return
+
+    flush_draw_batch(game_state)
+    socketio.emit(
+        "canvasSnapshot",
+        game_state.canvas_history.encode_snapshot(),
+        room=game_state.lobby_id,
+        skip_sid=game_state.current_round["drawer"]
+    )
+
+
+@socketio.on("scoreboardResync")
+@rate_limited("scoreboardResync", coalesce=resend_scoreboard)
+def handle_scoreboard_resync():
+    # Client saw a gap in scoreboard seq numbers
+    resend_scoreboard(request.sid)
 
-    # Clear everyone’s canvas
-    emit("clear", {}, broadcast=True)
 
-    # Replay the remaining history
-    for event_type, payload in game_state.canvas_history:
-        emit(event_type, payload, broadcast=True)
+@socketio.on("resync")
+@rate_limited("resync", coalesce=resend_canvas)
+def handle_resync():
+    # Full redraw fallback for a client whose local history drifted
+    resend_canvas(request.sid)
 
 
 @socketio.on("clear")
+@rate_limited("clear")
 def handle_clear():
-    if request.sid == game_state.current_round["drawer"]:
-        game_state.canvas_history.clear()
-        emit("clear", {}, broadcast=True, include_self=False)
+    game_state = drawer_lobby(request.sid)
+    if game_state is None:
+        return
+
+    discard_draw_batch(game_state)
+    game_state.canvas_history.clear()
+    lobbies.canvas_changed(game_state)
+    emit("clear", {}, room=game_state.lobby_id, include_self=False)
 
 
 @socketio.on("forceRoundEnd")
 def handle_force_round_end():
-    if request.sid != game_state.current_round["drawer"]:
-        return
-    
-    if not game_state.current_round["active"]:
+    game_state = drawer_lobby(request.sid)
+    if game_state is None:
         return
 
-    game_state.current_round["active"] = False
-    game_state.current_drawer_index = (game_state.current_drawer_index + 1) % len(game_state.players_order)
-    emit("chatMessage", {
-        "type": "reveal",
-        "word": game_state.current_round["prompt"],
-        "sender_zone": 2
-    }, broadcast=True)
-    start_new_round()
+    # Ignored outside the drawing phase, e.g. a repeat during the next countdown
+    end_round(game_state)
 
 
 @socketio.on("chatMessage")
+@rate_limited("chatMessage")
 def handle_chat_message(data):
     sid = request.sid
-    if sid not in game_state.players:
+    game_state = lobbies.for_sid(sid)
+    if game_state is None:
         return
 
-    message = data.get("message", "").strip()
+    lobbies.sync(game_state)
+    if sid not in game_state.players or not isinstance(data, dict):
+        return
+
+    message = str(data.get("message", "")).strip()
     name = game_state.players[sid]["name"]
 
     drawer_sid = game_state.current_round["drawer"]
-    prompt = game_state.current_round["prompt"].lower() if game_state.current_round["prompt"] else ""
+    guess = None
 
     # STEP 1 — HANDLE CORRECT GUESS FIRST
-    if game_state.current_round["active"] and game_state.current_round["prompt"]:
-        if sid != drawer_sid and message.lower() == prompt:
+    # Guesses only count once the round is past its countdown
+    matcher = matcher_for(game_state) if game_state.current_round["phase"] == PHASE_DRAWING else None
+    if matcher is not None and sid != drawer_sid and sid not in game_state.current_round["correct_guessers"]:
+        guess = matcher.check(message)
+        if guess == GUESS_CORRECT:
+            game_state.current_round["correct_guessers"].add(sid)
+            place_player(game_state, sid)
+
+            ROUND_TIME = 100
+            elapsed = time.time() - game_state.current_round["time_started"]
+            remaining = max(0, ROUND_TIME - elapsed)
+            percent_left = remaining / ROUND_TIME
+
+            # Scoring rules
+            if percent_left >= 0.80:
+                guesser_points = 3
+            elif percent_left >= 0.40:
+                guesser_points = 2
+            else:
+                guesser_points = 1
 
-            # Already guessed before? Ignore repeat guesses
-            if sid not in game_state.current_round["correct_guessers"]:
+            game_state.players[sid]["score"] += guesser_points
+            game_state.players[drawer_sid]["score"] += 1  # drawer always +1
+            lobbies.store.save_player(game_state, sid)
+            lobbies.store.save_player(game_state, drawer_sid)
+            score_changed(game_state, sid)
+            score_changed(game_state, drawer_sid)
+            lobbies.store.update_round(game_state, "correct_guessers")
 
-                game_state.current_round["correct_guessers"].add(sid)
+            emit("chatMessage", {
+                "type": "correct",
+                "name": name,
+                "sender_zone": 2
+            }, room=game_state.lobby_id)
 
-                ROUND_TIME = 100
-                elapsed = time.time() - game_state.current_round["time_started"]
-                remaining = max(0, ROUND_TIME - elapsed)
-                percent_left = remaining / ROUND_TIME
+            # guess-percentage-based reveals
+            guesser_count = len(game_state.players_order) - 1
+            if guesser_count > 0:
+                ratio = len(game_state.current_round["correct_guessers"]) / guesser_count
 
-                # Scoring rules
-                if percent_left >= 0.80:
-                    guesser_points = 3
-                elif percent_left >= 0.40:
-                    guesser_points = 2
-                else:
-                    guesser_points = 1
+                # 70% threshold → 2nd reveal (if not already done)
+                if ratio >= 0.7 and game_state.current_round["guess_reveals_done"] < 2:
+                    reveal_random_letters(game_state, 1)
+                    game_state.current_round["guess_reveals_done"] = 2
 
-                game_state.players[sid]["score"] += guesser_points
-                game_state.players[drawer_sid]["score"] += 1  # drawer always +1
+                # 40% threshold → 1st reveal (if not already done)
+                elif ratio >= 0.4 and game_state.current_round["guess_reveals_done"] < 1:
+                    reveal_random_letters(game_state, 1)
+                    game_state.current_round["guess_reveals_done"] = 1
 
-                emit("chatMessage", {
-                    "type": "correct",
-                    "name": name,
-                    "sender_zone": 2
-                }, broadcast=True)
-
-                emit("playerList", [
-                    {
-                        "name": p["name"],
-                        "avatar": p["avatar"],
-                        "score": p["score"]
-                    }
-                    for p in game_state.players.values()
-                ], broadcast=True)
-
-                # guess-percentage-based reveals
-                guesser_count = len(game_state.players_order) - 1
-                if guesser_count > 0:
-                    ratio = len(game_state.current_round["correct_guessers"]) / guesser_count
-
-                    # 70% threshold → 2nd reveal (if not already done)
-                    if ratio >= 0.7 and game_state.current_round["guess_reveals_done"] < 2:
-                        reveal_random_letters(1)
-                        game_state.current_round["guess_reveals_done"] = 2
-
-                    # 40% threshold → 1st reveal (if not already done)
-                    elif ratio >= 0.4 and game_state.current_round["guess_reveals_done"] < 1:
-                        reveal_random_letters(1)
-                        game_state.current_round["guess_reveals_done"] = 1
-
-                # Check if all guessers finished
-                if guesser_count > 0 and len(game_state.current_round["correct_guessers"]) == guesser_count:
-                    game_state.current_round["active"] = False
-                    game_state.current_drawer_index = (game_state.current_drawer_index + 1) % len(game_state.players_order)
-                    emit("chatMessage", {
-                        "type": "reveal",
-                        "word": game_state.current_round["prompt"],
-                        "sender_zone": 2
-                    }, broadcast=True)
-                    start_new_round()
-
-                return
+            # Check if all guessers finished
+            if guesser_count > 0 and len(game_state.current_round["correct_guessers"]) == guesser_count:
+                end_round(game_state)
+
+            return
 
     # STEP 2 — ROUTE MESSAGE BASED ON UPDATED ZONES
     # Determine sender zone
@@ -365,19 +593,23 @@ def handle_chat_message(data):
 
     # ZONE 1: only unguessed guessers receive zone1 messages
     if sender_zone == 1:
-        for sid2 in game_state.players:
-            if sid2 != drawer_sid and sid2 not in game_state.current_round["correct_guessers"]:
-                emit("chatMessage", {
-                    "name": name,
-                    "message": message,
-                    "sender_zone": 1
-                }, room=sid2)
+        emit("chatMessage", {
+            "name": name,
+            "message": message,
+            "sender_zone": 1
+        }, room=guessing_room(game_state.lobby_id))
 
     # ZONE 2: drawer + guessed guessers receive ALL messages
-    for sid2 in game_state.players:
-        if sid2 == drawer_sid or sid2 in game_state.current_round["correct_guessers"]:
-            emit("chatMessage", {
-                "name": name,
-                "message": message,
-                "sender_zone": sender_zone
-            }, room=sid2)
\ No newline at end of file
+    emit("chatMessage", {
+        "name": name,
+        "message": message,
+        "sender_zone": sender_zone
+    }, room=[drawer_room(game_state.lobby_id), solved_room(game_state.lobby_id)])
+
+    # Near miss: only the guesser is told
+    if guess == GUESS_CLOSE:
+        emit("chatMessage", {
+            "type": "close",
+            "message": message,
+            "sender_zone": 1
+        }, room=sid)
\ No newline at end of file
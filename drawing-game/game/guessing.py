@@ -0,0 +1,100 @@
+#  Guess matching for chat messages
+import unicodedata
+
+GUESS_CORRECT = "correct"
+GUESS_CLOSE = "close"
+
+# Messages this much longer than the longest accepted form are never checked
+MAX_GUESS_SLACK = 2
+
+
+def normalize_guess(text) -> str:
+    """
+    Folds case and accents and drops everything but letters and digits,
+    so "Ice-cream", "ice cream" and "ICE CRÈAM" all become "icecream".
+    """
+    if not isinstance(text, str):
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(ch for ch in decomposed if ch.isalnum())
+
+
+def close_threshold(length) -> int:
+    """Typos allowed for a near miss: one for short words, two from six letters."""
+    if length <= 3:
+        return 0
+    return 1 if length <= 5 else 2
+
+
+def within_distance(a, b, k) -> bool:
+    """
+    Levenshtein distance(a, b) <= k, computed only on the diagonal band of width
+    2k + 1 and abandoned as soon as a whole row exceeds k: O(len(a) * k).
+    """
+    if abs(len(a) - len(b)) > k:
+        return False
+    if k == 0:
+        return a == b
+
+    big = k + 1
+    # prev[j] holds the distance for b[:j]; only j in [i - k, i + k] is ever valid
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        lo, hi = max(1, i - k), min(len(b), i + k)
+        cur = [big] * (len(b) + 1)
+        if i <= k:
+            cur[0] = i
+        row_min = cur[0]
+        ai = a[i - 1]
+        for j in range(lo, hi + 1):
+            cost = 0 if ai == b[j - 1] else 1
+            d = min(prev[j - 1] + cost, prev[j] + 1, cur[j - 1] + 1)
+            cur[j] = d if d < big else big
+            if cur[j] < row_min:
+                row_min = cur[j]
+        if row_min > k:
+            return False
+        prev = cur
+    return prev[len(b)] <= k
+
+
+class GuessMatcher:
+    """
+    Built once per round. Holds the normalized prompt and its accepted aliases,
+    so checking a chat message is one normalization plus a few bounded compares.
+    """
+
+    def __init__(self, prompt, aliases=()):
+        self.prompt = prompt
+        forms = {normalize_guess(prompt)}
+        forms.update(normalize_guess(alias) for alias in aliases)
+        forms.discard("")
+        self.forms = frozenset(forms)
+        self.max_len = max((len(f) for f in self.forms), default=0) + MAX_GUESS_SLACK
+
+    def check(self, message):
+        """Returns GUESS_CORRECT, GUESS_CLOSE or None."""
+        guess = normalize_guess(message[:self.max_len * 4] if isinstance(message, str) else message)
+        if not guess or len(guess) > self.max_len:
+            return None
+
+        if guess in self.forms:
+            return GUESS_CORRECT
+
+        for form in self.forms:
+            if within_distance(guess, form, close_threshold(len(form))):
+                return GUESS_CLOSE
+        return None
+
+
+def matcher_for(game_state):
+    """The current round's matcher; rebuilt only when the prompt changed."""
+    prompt = game_state.current_round["prompt"]
+    if not prompt:
+        return None
+
+    matcher = game_state.guess_matcher
+    if matcher is None or matcher.prompt != prompt:
+        aliases = game_state.word_bag.table.aliases.get(prompt, ())
+        matcher = game_state.guess_matcher = GuessMatcher(prompt, aliases)
+    return matcher
@@ -1,5 +1,4 @@
 #  Helper functions
-from game.state import game_state
 
 def compute_max_reveals(word_len: int) -> int:
     if word_len <= 4:
@@ -32,5 +31,5 @@ def build_masked_word(prompt: str, revealed_indices: set) -> str:
             chars.append("_")
     return " ".join(chars)
 
-def log_event(event_type, data=None):
-    game_state.canvas_history.append((event_type, data or {}))
\ No newline at end of file
+def log_event(game_state, event_type, data=None):
+    return game_state.canvas_history.append(event_type, data)
\ No newline at end of file
@@ -1,31 +1,108 @@
+import os
 import time
-import random
-from flask_socketio import emit
 from extensions.socketio import socketio
-from game.state import game_state
 from game.helpers import compute_max_reveals
-from game.reveal import manage_time_reveals
+from game.reveal import schedule_time_reveals
+from game.batching import discard_draw_batch
+from game.state import lobbies
+from game.scheduler import scheduler, schedule_for_round, cancel_round_timers
+from game.rooms import place_players, guessing_room
+from game.guessing import matcher_for
+
+# Pause between "roundStarting" and the round actually starting
+ROUND_COUNTDOWN_SECONDS = 3
+
+# With a shared store, how often each process looks for rounds moved on elsewhere
+ROUND_WATCH_SECONDS = float(os.getenv("ROUND_WATCH_MS", "2000")) / 1000
+
+# Round lifecycle, stored in current_round["phase"]:
+#
+#   idle --start--> countdown --begin--> drawing --end--> countdown --begin--> ...
+#                   countdown / drawing --drawer_left--> countdown (next drawer)
+#   any --reset--> idle
+#
+# Every change of phase goes through transition(). An event that is not allowed in
+# the current phase is dropped, so racing events resolve the same way every time:
+# whichever arrives first wins and the rest find the phase already moved on.
+PHASE_IDLE = "idle"
+PHASE_COUNTDOWN = "countdown"
+PHASE_DRAWING = "drawing"
+
+ROUND_TRANSITIONS = {
+    "start": ({PHASE_IDLE}, PHASE_COUNTDOWN),
+    "begin": ({PHASE_COUNTDOWN}, PHASE_DRAWING),
+    "end": ({PHASE_DRAWING}, PHASE_COUNTDOWN),
+    "drawer_left": ({PHASE_COUNTDOWN, PHASE_DRAWING}, PHASE_COUNTDOWN),
+    "reset": ({PHASE_IDLE, PHASE_COUNTDOWN, PHASE_DRAWING}, PHASE_IDLE),
+}
+
+
+def can_transition(game_state, event) -> bool:
+    allowed_from, _ = ROUND_TRANSITIONS[event]
+    return game_state.current_round["phase"] in allowed_from
+
+
+def transition(game_state, event) -> bool:
+    """Moves the round to the phase event leads to. Returns False if not allowed now."""
+    if not can_transition(game_state, event):
+        return False
+
+    _, phase = ROUND_TRANSITIONS[event]
+    game_state.current_round["phase"] = phase
+    # "active" covers the countdown too, like before phases existed
+    game_state.current_round["active"] = phase != PHASE_IDLE
+    return True
+
+
+def reset_lobby(game_state):
+    cancel_round_timers(game_state)
+    transition(game_state, "reset")
 
-def reset_lobby():
     game_state.current_round["drawer"] = None
     game_state.current_round["prompt"] = None
-    game_state.current_round["active"] = False
     game_state.current_round["correct_guessers"] = set()
     game_state.current_round["time_started"] = None
     game_state.current_round["revealed_indices"] = set()
     game_state.current_round["max_reveals"] = 0
     game_state.current_round["guess_reveals_done"] = 0
+    game_state.guess_matcher = None
 
     game_state.current_drawer_index = 0
 
+    # Another worker already moved this lobby on
+    if not lobbies.store.commit_round(game_state):
+        lobbies.sync(game_state)
+        return
+    game_state.timers_version = game_state.round_version
+
+    discard_draw_batch(game_state)
+    place_players(game_state, lobbies.local_sids(game_state))
+
     # Clear canvas for all players
-    emit("clear", {}, broadcast=True)
+    socketio.emit("clear", {}, room=game_state.lobby_id)
 
     # Tell clients to stop timer & reset header
-    emit("lobbyReset", {}, broadcast=True)
+    socketio.emit("lobbyReset", {}, room=game_state.lobby_id)
+
 
+def start_game(game_state):
+    """Enough players are seated: leave idle and start the first countdown."""
+    if len(game_state.players_order) < 2 or not transition(game_state, "start"):
+        return False
+
+    game_state.current_drawer_index = 0
+    start_new_round(game_state)
+    return True
+
+
+def start_new_round(game_state):
+    """
+    Picks the drawer and prompt and starts the countdown. Returns right away;
+    begin_round() runs from the scheduler once the countdown is over.
+    Callers have already moved the phase to countdown.
+    """
+    cancel_round_timers(game_state)
 
-def start_new_round():
     if not game_state.players_order:
         print("No players available to start round.")
         return
@@ -35,12 +112,16 @@ def start_new_round():
         game_state.current_drawer_index = 0
 
     drawer_sid = game_state.players_order[game_state.current_drawer_index]
-    prompt = random.choice(game_state.words)
+    prompt = game_state.word_bag.draw()
+    if prompt is None:
+        print(f"Pack {game_state.CURRENT_PACK} has no words, cannot start round.")
+        transition(game_state, "reset")
+        return
 
     game_state.current_round["drawer"] = drawer_sid
     game_state.current_round["prompt"] = prompt
-    game_state.current_round["active"] = True
     game_state.current_round["correct_guessers"] = set()
+    game_state.current_round["time_started"] = None
 
     # Reveal state for this word
     word_len = len(prompt)
@@ -48,42 +129,187 @@ def start_new_round():
     game_state.current_round["max_reveals"] = compute_max_reveals(word_len)
     game_state.current_round["guess_reveals_done"] = 0
 
+    # Another worker already started the next round
+    if not lobbies.store.commit_round(game_state):
+        lobbies.sync(game_state)
+        return
+
+    # Built once here so chat messages only pay for normalizing themselves
+    matcher_for(game_state)
+
     print("Round initializing...")
     print(f"Drawer: {game_state.players[drawer_sid]['name']}  Prompt: {prompt}")
 
+    discard_draw_batch(game_state)
+    place_players(game_state, lobbies.local_sids(game_state))
     game_state.canvas_history.clear()
+    lobbies.store.save_canvas(game_state)
     # Immediate UI clear
-    emit("clear", {}, broadcast=True)
+    socketio.emit("clear", {}, room=game_state.lobby_id)
 
-    emit("roundStarting", {}, broadcast=True)
+    socketio.emit("roundStarting", {}, room=game_state.lobby_id)
 
-    socketio.sleep(3)
+    schedule_for_round(
+        game_state,
+        ROUND_COUNTDOWN_SECONDS,
+        begin_round,
+        game_state,
+        game_state.round_version
+    )
+    game_state.timers_version = game_state.round_version
+
+
+def begin_round(game_state, round_version):
+    # Round was reset or replaced during the countdown
+    if game_state.round_version != round_version or not transition(game_state, "begin"):
+        return
+
+    drawer_sid = game_state.current_round["drawer"]
+    prompt = game_state.current_round["prompt"]
 
     game_state.current_round["time_started"] = time.time()
+    if not lobbies.store.commit_round(game_state):
+        lobbies.sync(game_state)
+        return
 
-    for sid in game_state.players:
-        emit("roundStarted", {
-            "role": "drawer" if sid == drawer_sid else "guesser",
-            "startTime": game_state.current_round["time_started"]
-        }, room=sid)
+    for role, room in (("drawer", drawer_sid), ("guesser", guessing_room(game_state.lobby_id))):
+        socketio.emit("roundStarted", {
+            "role": role,
+            "startTime": game_state.current_round["time_started"],
+            "duration": game_state.ROUND_TOTAL_SECONDS
+        }, room=room)
 
     # Drawer prompt
-    emit("roundPrompt", {
+    socketio.emit("roundPrompt", {
         "role": "drawer",
         "prompt": prompt
     }, room=drawer_sid)
 
-    # Guessers get length
-    for sid in game_state.players:
-        if sid != drawer_sid:
-            emit("roundPrompt", {
-                "role": "guesser",
-                "length": len(prompt)
-            }, room=sid)
-
-    # Start background task for time-based reveals
-    socketio.start_background_task(
-        manage_time_reveals,
-        game_state.current_round["time_started"],
-        word_len
-    )
\ No newline at end of file
+    # Guessers get length (nobody has solved it yet, so they are all in one group)
+    socketio.emit("roundPrompt", {
+        "role": "guesser",
+        "length": len(prompt)
+    }, room=guessing_room(game_state.lobby_id))
+
+    # Time-based reveals and the server-side end of the round
+    schedule_time_reveals(game_state, len(prompt))
+    schedule_for_round(
+        game_state,
+        game_state.ROUND_TOTAL_SECONDS,
+        expire_round,
+        game_state,
+        game_state.round_version
+    )
+    game_state.timers_version = game_state.round_version
+
+
+def expire_round(game_state, round_version):
+    if game_state.round_version != round_version:
+        return
+    end_round(game_state)
+
+
+def end_round(game_state):
+    """
+    Reveals the word, passes the turn to the next player and starts the next round.
+    Only a round in the drawing phase can end; returns False otherwise.
+    """
+    if not transition(game_state, "end"):
+        return False
+
+    game_state.current_drawer_index = (game_state.current_drawer_index + 1) % len(game_state.players_order)
+    socketio.emit("chatMessage", {
+        "type": "reveal",
+        "word": game_state.current_round["prompt"],
+        "sender_zone": 2
+    }, room=game_state.lobby_id)
+    start_new_round(game_state)
+    return True
+
+
+def drawer_left(game_state):
+    """
+    The drawer disconnected (already removed from players_order) with at least two
+    players left. The turn passes to whoever now sits at the drawer's index.
+    """
+    was_drawing = game_state.current_round["phase"] == PHASE_DRAWING
+    if not transition(game_state, "drawer_left"):
+        return False
+
+    # Guessers only ever saw the word if the round got past its countdown
+    if was_drawing:
+        socketio.emit("chatMessage", {
+            "type": "reveal",
+            "word": game_state.current_round["prompt"],
+            "sender_zone": 2
+        }, room=game_state.lobby_id)
+
+    game_state.current_drawer_index = game_state.current_drawer_index % len(game_state.players_order)
+    start_new_round(game_state)
+    return True
+
+
+# ---------- rounds committed by other processes ----------
+#
+# Only the process that commits a round transition schedules its timers. Every
+# other process holding players of the lobby re-reads the round each
+# ROUND_WATCH_SECONDS and keeps a backup of the timer that moves the round on,
+# fired a little late. Whichever process gets there first commits; the others
+# find round_version already moved on and stand down, so a round still ends
+# when the process that started it is gone.
+
+_watching = False
+
+
+def watch_rounds():
+    """Starts the round watcher of this process, if lobbies are shared. Idempotent."""
+    global _watching
+    if _watching or not lobbies.store.shared:
+        return
+    _watching = True
+    scheduler.call_later(ROUND_WATCH_SECONDS, _watch_tick)
+
+
+def _watch_tick():
+    global _watching
+    try:
+        for game_state in list(lobbies.lobbies.values()):
+            # Handlers sync as well; a lobby synced recently is fresh enough
+            if time.monotonic() - game_state.synced_at >= ROUND_WATCH_SECONDS / 2:
+                lobbies.sync(game_state)
+            # sync() lets go of lobbies deleted by another process
+            if lobbies.get(game_state.lobby_id) is game_state:
+                adopt_round(game_state)
+    finally:
+        if lobbies.lobbies:
+            scheduler.call_later(ROUND_WATCH_SECONDS, _watch_tick)
+        else:
+            _watching = False
+
+
+def adopt_round(game_state):
+    """Schedules the backup timer of a round this process did not commit."""
+    if game_state.timers_version == game_state.round_version:
+        return
+
+    cancel_round_timers(game_state)
+    game_state.timers_version = game_state.round_version
+
+    phase = game_state.current_round["phase"]
+    grace = ROUND_WATCH_SECONDS * 2
+    if phase == PHASE_COUNTDOWN:
+        # When the countdown started is not stored; it is at most this long
+        delay, step = ROUND_COUNTDOWN_SECONDS + grace, begin_round
+    elif phase == PHASE_DRAWING and game_state.current_round["time_started"]:
+        remaining = game_state.current_round["time_started"] + game_state.ROUND_TOTAL_SECONDS - time.time()
+        delay, step = max(0.0, remaining) + grace, expire_round
+    else:
+        return
+
+    schedule_for_round(game_state, delay, _take_over, game_state, game_state.round_version, step)
+
+
+def _take_over(game_state, round_version, step):
+    lobbies.sync(game_state)
+    if lobbies.get(game_state.lobby_id) is game_state and game_state.round_version == round_version:
+        step(game_state, round_version)
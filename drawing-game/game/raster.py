@@ -0,0 +1,320 @@
+#  Server-side canvas rasterizer used for checkpoints
+import math
+import re
+import struct
+import zlib
+
+DEFAULT_CANVAS_SIZE = (800, 600)
+MAX_CANVAS_SIDE = 4096
+
+TRANSPARENT = (0, 0, 0, 0)
+WHITE = (255, 255, 255, 255)
+
+# Named colors the client actually sends (default brush is "black")
+NAMED_COLORS = {
+    "black": (0, 0, 0, 255),
+    "white": WHITE,
+    "red": (255, 0, 0, 255),
+    "orange": (255, 165, 0, 255),
+    "yellow": (255, 255, 0, 255),
+    "green": (0, 128, 0, 255),
+    "blue": (0, 0, 255, 255),
+    "purple": (128, 0, 128, 255),
+    "gray": (128, 128, 128, 255),
+    "grey": (128, 128, 128, 255),
+    "brown": (165, 42, 42, 255),
+}
+
+_RGB_RE = re.compile(r"^rgba?\(\s*([\d.]+)\s*,\s*([\d.]+)\s*,\s*([\d.]+)\s*(?:,\s*([\d.]+)\s*)?\)$")
+
+# Tolerances from fillBucket() in static/js/drawing.js
+FILL_SKIP_TOLERANCE = 1
+FILL_REGION_TOLERANCE = 10
+FILL_EXPAND_TOLERANCE = 20
+
+# How many pixels a flood fill visits between cooperative yields
+FILL_YIELD_EVERY = 20000
+
+
+def parse_color(color) -> tuple:
+    """
+    Parses the CSS colors the client sends (rgb()/rgba(), #hex, a few names) into RGBA.
+    Anything unrecognized falls back to black.
+    """
+    if not isinstance(color, str):
+        return NAMED_COLORS["black"]
+
+    color = color.strip().lower()
+    if color in NAMED_COLORS:
+        return NAMED_COLORS[color]
+
+    if color.startswith("#"):
+        hex_part = color[1:]
+        if len(hex_part) in (3, 4):
+            hex_part = "".join(ch * 2 for ch in hex_part)
+        try:
+            if len(hex_part) == 6:
+                return (int(hex_part[0:2], 16), int(hex_part[2:4], 16), int(hex_part[4:6], 16), 255)
+            if len(hex_part) == 8:
+                return tuple(int(hex_part[i:i + 2], 16) for i in range(0, 8, 2))
+        except ValueError:
+            pass
+        return NAMED_COLORS["black"]
+
+    match = _RGB_RE.match(color)
+    if match:
+        r, g, b = (min(255, int(float(v))) for v in match.groups()[:3])
+        alpha = match.group(4)
+        a = 255 if alpha is None else min(255, int(round(float(alpha) * 255)))
+        return (r, g, b, a)
+
+    return NAMED_COLORS["black"]
+
+
+def clamp_canvas_size(width, height) -> tuple:
+    try:
+        width, height = int(width), int(height)
+    except (TypeError, ValueError):
+        return DEFAULT_CANVAS_SIZE
+    if width <= 0 or height <= 0:
+        return DEFAULT_CANVAS_SIZE
+    return min(width, MAX_CANVAS_SIDE), min(height, MAX_CANVAS_SIDE)
+
+
+def _colors_match(buf, i, target, tolerance):
+    return (
+        abs(buf[i] - target[0]) <= tolerance and
+        abs(buf[i + 1] - target[1]) <= tolerance and
+        abs(buf[i + 2] - target[2]) <= tolerance and
+        abs(buf[i + 3] - target[3]) <= tolerance
+    )
+
+
+class CanvasRaster:
+    """
+    RGBA bitmap that mirrors what static/js/drawing.js paints on a guesser's canvas.
+
+    Shapes are painted as solid spans (pixel centers inside the shape), which matches
+    the client up to anti-aliasing. yield_fn, if given, is called during long fills
+    so a background worker can hand the event loop back to other greenlets.
+    """
+
+    def __init__(self, width, height, pixels=None, yield_fn=None):
+        self.width = width
+        self.height = height
+        self.pixels = pixels if pixels is not None else bytearray(width * height * 4)
+        self.yield_fn = yield_fn
+
+    # ---------- shapes ----------
+
+    def _span(self, y, x0, x1, rgba_bytes):
+        """Paints pixel centers in [x0, x1] on row y."""
+        if y < 0 or y >= self.height:
+            return
+        start = max(0, math.ceil(x0 - 0.5))
+        end = min(self.width - 1, math.floor(x1 - 0.5))
+        if end < start:
+            return
+        row = y * self.width * 4
+        self.pixels[row + start * 4:row + (end + 1) * 4] = rgba_bytes * (end - start + 1)
+
+    def dot(self, x, y, size, rgba):
+        """ctx.arc(x, y, size / 2) + fill()"""
+        r = max(float(size or 0), 0.0) / 2
+        rgba_bytes = bytes(rgba)
+        for py in range(math.floor(y - r), math.ceil(y + r) + 1):
+            dy = py + 0.5 - y
+            if abs(dy) > r:
+                continue
+            half = math.sqrt(r * r - dy * dy)
+            self._span(py, x - half, x + half, rgba_bytes)
+
+    def segment(self, x0, y0, x1, y1, size, rgba):
+        """One moveTo/lineTo/stroke() with lineCap = "round"."""
+        r = max(float(size or 0), 0.0) / 2
+        rgba_bytes = bytes(rgba)
+
+        dx, dy = x1 - x0, y1 - y0
+        length = math.hypot(dx, dy)
+        if length == 0:
+            self.dot(x0, y0, size, rgba)
+            return
+
+        ux, uy = dx / length, dy / length
+        top = math.floor(min(y0, y1) - r)
+        bottom = math.ceil(max(y0, y1) + r)
+
+        for py in range(top, bottom + 1):
+            cy = py + 0.5
+            lo, hi = math.inf, -math.inf
+
+            # Round caps
+            for cx0, cy0 in ((x0, y0), (x1, y1)):
+                d = cy - cy0
+                if abs(d) <= r:
+                    half = math.sqrt(r * r - d * d)
+                    lo, hi = min(lo, cx0 - half), max(hi, cx0 + half)
+
+            # Body: |(p - p0) x u| <= r and 0 <= (p - p0) . u <= length
+            body_lo, body_hi = -math.inf, math.inf
+            ry = cy - y0
+            for a, b, low, high in ((uy, -ux * ry, -r, r), (ux, uy * ry, 0.0, length)):
+                # Solve low <= a * (x - x0) + b <= high for x
+                if a == 0:
+                    if not (low <= b <= high):
+                        body_lo, body_hi = math.inf, -math.inf
+                    continue
+                e0, e1 = (low - b) / a, (high - b) / a
+                if e0 > e1:
+                    e0, e1 = e1, e0
+                body_lo, body_hi = max(body_lo, x0 + e0), min(body_hi, x0 + e1)
+
+            if body_lo <= body_hi:
+                lo, hi = min(lo, body_lo), max(hi, body_hi)
+
+            if lo <= hi:
+                self._span(py, lo, hi, rgba_bytes)
+
+    def stroke(self, points, size, rgba):
+        """A startPath followed by draw events: one segment per consecutive point pair."""
+        for i in range(2, len(points), 2):
+            self.segment(points[i - 2], points[i - 1], points[i], points[i + 1], size, rgba)
+
+    def fill(self, start_x, start_y, rgba):
+        """Port of fillBucket(): tolerant 4-way flood, optional 1px growth, then paint."""
+        w, h, buf = self.width, self.height, self.pixels
+        if not (0 <= start_x < w and 0 <= start_y < h):
+            return
+
+        start = (start_y * w + start_x) * 4
+        target = tuple(buf[start:start + 4])
+
+        # Detect if fill is unnecessary
+        if all(abs(a - b) <= FILL_SKIP_TOLERANCE for a, b in zip(rgba, target)):
+            return
+
+        # Phase 1: region finding. Like the client, neighbors are marked before they
+        # are tested, so the non-matching border ends up in the mask too.
+        mask = bytearray(w * h)
+        visited = [start_y * w + start_x]
+        mask[visited[0]] = 1
+        stack = [visited[0]]
+        steps = 0
+
+        while stack:
+            p = stack.pop()
+            steps += 1
+            if self.yield_fn and steps % FILL_YIELD_EVERY == 0:
+                self.yield_fn()
+
+            if not _colors_match(buf, p * 4, target, FILL_REGION_TOLERANCE):
+                continue
+
+            x = p % w
+            for n, ok in ((p - 1, x > 0), (p + 1, x < w - 1), (p - w, p >= w), (p + w, p < w * (h - 1))):
+                if ok and not mask[n]:
+                    mask[n] = 1
+                    visited.append(n)
+                    stack.append(n)
+
+        # Phase 2: a near-match pixel just outside the region means it needs expansion
+        def interior(p):
+            x, y = p % w, p // w
+            return 0 < x < w - 1 and 0 < y < h - 1
+
+        neighbors = (-w - 1, -w, -w + 1, -1, 1, w - 1, w, w + 1)
+        expansion_needed = False
+        for p in visited:
+            if not interior(p):
+                continue
+            for off in neighbors:
+                n = p + off
+                if not mask[n] and _colors_match(buf, n * 4, target, FILL_EXPAND_TOLERANCE):
+                    expansion_needed = True
+                    break
+            if expansion_needed:
+                break
+
+        # Phase 3: grow region by exactly 1px
+        if expansion_needed:
+            grown = []
+            for p in visited:
+                if not interior(p):
+                    continue
+                for off in neighbors:
+                    n = p + off
+                    if not mask[n]:
+                        mask[n] = 1
+                        grown.append(n)
+            visited.extend(grown)
+
+        # Phase 4: paint
+        rgba_bytes = bytes(rgba)
+        for p in visited:
+            buf[p * 4:p * 4 + 4] = rgba_bytes
+
+    def apply(self, event_type, style, points):
+        """Paints one CanvasHistory op."""
+        color, size, tool = style
+        rgba = WHITE if tool == "eraser" else parse_color(color)
+
+        if event_type == "startPath":
+            self.stroke(points, size, rgba)
+        elif event_type == "dot":
+            self.dot(points[0], points[1], size, rgba)
+        elif event_type == "fill":
+            self.fill(points[0], points[1], parse_color(color))
+
+    # ---------- PNG ----------
+
+    def to_png(self) -> bytes:
+        row_len = self.width * 4
+        view = memoryview(self.pixels)
+        raw = b"".join(
+            b"\x00" + view[y * row_len:(y + 1) * row_len]
+            for y in range(self.height)
+        )
+
+        def chunk(tag, body):
+            return struct.pack(">I", len(body)) + tag + body + struct.pack(">I", zlib.crc32(tag + body))
+
+        header = struct.pack(">IIBBBBB", self.width, self.height, 8, 6, 0, 0, 0)
+        return (
+            b"\x89PNG\r\n\x1a\n" +
+            chunk(b"IHDR", header) +
+            chunk(b"IDAT", zlib.compress(raw, 6)) +
+            chunk(b"IEND", b"")
+        )
+
+    @classmethod
+    def from_png(cls, data: bytes, yield_fn=None):
+        """Reads back a PNG written by to_png() (8-bit RGBA, filter type 0 only)."""
+        if data[:8] != b"\x89PNG\r\n\x1a\n":
+            raise ValueError("Not a PNG")
+
+        pos = 8
+        width = height = None
+        idat = []
+        while pos < len(data):
+            length, tag = struct.unpack(">I4s", data[pos:pos + 8])
+            body = data[pos + 8:pos + 8 + length]
+            pos += 12 + length
+            if tag == b"IHDR":
+                width, height, depth, color_type = struct.unpack(">IIBB", body[:10])
+                if depth != 8 or color_type != 6:
+                    raise ValueError("Unsupported PNG format")
+            elif tag == b"IDAT":
+                idat.append(body)
+            elif tag == b"IEND":
+                break
+
+        raw = zlib.decompress(b"".join(idat))
+        row_len = width * 4
+        pixels = bytearray()
+        for y in range(height):
+            start = y * (row_len + 1)
+            if raw[start] != 0:
+                raise ValueError("Unsupported PNG filter")
+            pixels += raw[start + 1:start + 1 + row_len]
+
+        return cls(width, height, pixels, yield_fn)
@@ -0,0 +1,216 @@
+#  Per-connection token buckets for socket events
+import functools
+import math
+import os
+import time
+from flask import request
+from extensions.socketio import socketio
+from game.scheduler import scheduler
+
+# Which budget each event draws from. Events not listed are not limited.
+# Draw points are never limited: however fast they arrive, game/batching.py
+# relays them as one drawBatch per tick.
+EVENT_CLASSES = {
+    # Structural drawing events. Never dropped, see relay_allowed()
+    "startPath": "stroke",
+    "dot": "stroke",
+    "endPath": "stroke",
+    "fill": "stroke",
+    "drawBin": "stroke",
+    # Lobby-wide rebroadcasts, history rewrites and snapshots
+    "undo": "expensive",
+    "redo": "expensive",
+    "clear": "expensive",
+    "resync": "expensive",
+    "scoreboardResync": "expensive",
+    "setPack": "expensive",
+    # Every message fans out to up to the whole lobby
+    "chatMessage": "chat",
+}
+
+
+def _budget(name, default):
+    """RATE_LIMIT_<NAME>="<tokens per second>/<burst>". Malformed or non-positive values fall back to default."""
+    raw = os.getenv(f"RATE_LIMIT_{name.upper()}", default)
+    try:
+        rate, burst = (float(part) for part in raw.split("/"))
+    except ValueError:
+        rate, burst = 0.0, 0.0
+    if not (math.isfinite(rate) and rate > 0 and math.isfinite(burst)):
+        print(f"Ignoring RATE_LIMIT_{name.upper()}={raw!r}, using {default}")
+        rate, burst = (float(part) for part in default.split("/"))
+    return rate, max(1.0, burst)
+
+
+BUDGETS = {
+    "stroke": _budget("stroke", "60/180"),
+    "expensive": _budget("expensive", "4/10"),
+    "chat": _budget("chat", "2/6"),
+}
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT", "1") != "0"
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated", "throttling")
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        # True from the first dropped event until one is let through again
+        self.throttling = False
+
+    def take(self, now) -> bool:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        """Seconds until the next token is available."""
+        return max(0.0, (1 - self.tokens) / self.rate) if self.rate > 0 else float("inf")
+
+
+class RateLimiter:
+    """
+    sid -> event class -> TokenBucket. Buckets are created on a connection's first
+    limited event and dropped on disconnect, so idle lobbies cost nothing.
+    """
+
+    def __init__(self, budgets=BUDGETS, enabled=RATE_LIMIT_ENABLED):
+        self.budgets = budgets
+        self.enabled = enabled
+        self.buckets = {}
+        self.allowed = dict.fromkeys(budgets, 0)
+        self.throttled = dict.fromkeys(budgets, 0)
+        self.throttled_by_event = {}
+
+    def bucket(self, sid, event_class) -> TokenBucket:
+        sid_buckets = self.buckets.setdefault(sid, {})
+        bucket = sid_buckets.get(event_class)
+        if bucket is None:
+            bucket = sid_buckets[event_class] = TokenBucket(*self.budgets[event_class])
+        return bucket
+
+    def allow(self, sid, event):
+        """
+        Returns (allowed, first_drop). first_drop is True for the first dropped
+        event of a burst, so the caller can tell the client once instead of every time.
+        """
+        event_class = EVENT_CLASSES.get(event)
+        if not self.enabled or event_class is None:
+            return True, False
+
+        bucket = self.bucket(sid, event_class)
+        if bucket.take(time.monotonic()):
+            bucket.throttling = False
+            self.allowed[event_class] += 1
+            return True, False
+
+        self.throttled[event_class] += 1
+        self.throttled_by_event[event] = self.throttled_by_event.get(event, 0) + 1
+        first_drop = not bucket.throttling
+        bucket.throttling = True
+        return False, first_drop
+
+    def retry_after(self, sid, event) -> float:
+        return self.bucket(sid, EVENT_CLASSES[event]).wait_time()
+
+    def forget(self, sid):
+        self.buckets.pop(sid, None)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "budgets": {name: {"rate": rate, "burst": burst} for name, (rate, burst) in self.budgets.items()},
+            "allowed": dict(self.allowed),
+            "throttled": dict(self.throttled),
+            "throttled_by_event": dict(self.throttled_by_event),
+            "tracked_sids": len(self.buckets),
+            "throttling_sids": sum(
+                any(b.throttling for b in sid_buckets.values())
+                for sid_buckets in self.buckets.values()
+            ),
+        }
+
+
+# SHARED BY EVERY CONNECTION IN THIS PROCESS
+limiter = RateLimiter()
+
+# (sid, event) pairs with a coalesced call already scheduled
+_coalesced = set()
+
+
+def _run_coalesced(sid, event, callback):
+    _coalesced.discard((sid, event))
+    if sid in limiter.buckets:  # still connected
+        callback(sid)
+
+
+def rate_limited(event, coalesce=None):
+    """
+    Drops a handler's calls beyond the sid's budget for the event's class.
+
+    The client gets one "rateLimited" event per burst of drops. Requests where only
+    the latest matters (resyncs) pass coalesce(sid): dropped calls are folded into
+    a single coalesce(sid) once the bucket has a token again.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(*args):
+            sid = request.sid
+            allowed, first_drop = limiter.allow(sid, event)
+            if allowed:
+                return handler(*args)
+
+            retry_after = limiter.retry_after(sid, event)
+            if first_drop:
+                socketio.emit("rateLimited", {
+                    "event": event,
+                    "retry_after": round(retry_after, 2)
+                }, room=sid)
+
+            if coalesce is not None and (sid, event) not in _coalesced:
+                _coalesced.add((sid, event))
+                scheduler.call_later(retry_after, _run_coalesced, sid, event, coalesce)
+        return wrapper
+    return decorator
+
+
+# Shortest pause of a throttled drawer's relays; each pause ends in one full snapshot
+RELAY_PAUSE_SECONDS = 1.0
+
+
+def relay_allowed(game_state, event, resync) -> bool:
+    """
+    Budget check for the drawer's structural events, which are never dropped:
+    the caller applies the event to the canvas either way and relays it only if
+    this returns True. Past the budget the lobby's relays pause (draw batches
+    included, see game/batching.py) and once the bucket has refilled a single
+    resync(game_state) brings everyone else back in step.
+    """
+    sid = request.sid
+    allowed, first_drop = limiter.allow(sid, event)
+    if allowed and not game_state.relay_paused:
+        return True
+
+    if not allowed and first_drop:
+        socketio.emit("rateLimited", {
+            "event": event,
+            "retry_after": round(limiter.retry_after(sid, event), 2)
+        }, room=sid)
+
+    if not game_state.relay_paused:
+        game_state.relay_paused = True
+        delay = max(RELAY_PAUSE_SECONDS, limiter.retry_after(sid, event))
+        scheduler.call_later(delay, _resume_relays, game_state, resync)
+    return False
+
+
+def _resume_relays(game_state, resync):
+    game_state.relay_paused = False
+    resync(game_state)
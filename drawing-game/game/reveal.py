@@ -1,9 +1,11 @@
 import random
 from extensions.socketio import socketio
-from game.state import game_state
 from game.helpers import build_masked_word
+from game.state import lobbies
+from game.scheduler import schedule_for_round
+from game.rooms import guessing_room, solved_room
 
-def reveal_random_letters(num_letters: int):
+def reveal_random_letters(game_state, num_letters: int):
     """
     Core reveal function.
     - Respects max_reveals cap.
@@ -32,23 +34,21 @@ def reveal_random_letters(num_letters: int):
 
     chosen = random.sample(unrevealed, to_reveal)
     game_state.current_round["revealed_indices"].update(chosen)
+    lobbies.store.update_round(game_state, "revealed_indices")
 
     masked = build_masked_word(word, game_state.current_round["revealed_indices"])
 
-    drawer_sid = game_state.current_round["drawer"]
-
     # Send masked word to all guessers
-    for sid in game_state.players:
-        if sid != drawer_sid:
-            socketio.emit("letterReveal", {
-                "mask": masked
-            }, room=sid)
+    socketio.emit("letterReveal", {
+        "mask": masked
+    }, room=[guessing_room(game_state.lobby_id), solved_room(game_state.lobby_id)])
 
 
-def manage_time_reveals(start_time_snapshot: float, word_len: int):
+def schedule_time_reveals(game_state, word_len: int):
     """
     Time-based reveals at remaining 75s, 50s, 25s (assuming 100s total).
     That corresponds to elapsed times of 25s, 50s, 75s.
+    Timers live on the shared scheduler and are cancelled with the round.
     """
 
     # (elapsed_target, label)
@@ -58,33 +58,38 @@ def manage_time_reveals(start_time_snapshot: float, word_len: int):
         (game_state.ROUND_TOTAL_SECONDS - 25, "25"),  # 75s elapsed, 25s remaining
     ]
 
-    last_elapsed = 0
     for elapsed_target, label in thresholds:
-        sleep_for = elapsed_target - last_elapsed
-        if sleep_for > 0:
-            socketio.sleep(sleep_for)
-        last_elapsed = elapsed_target
-
-        # If round ended or a new round started, stop this task
-        if (not game_state.current_round["active"] or
-                game_state.current_round["time_started"] != start_time_snapshot):
-            return
-
-        # Decide how many letters to reveal per timing rule
-        if label == "75":
-            # Reveal at 75 seconds remaining → 1 letter
-            reveal_random_letters(1)
-
-        elif label == "50":
-            # Reveal at 50 seconds remaining:
-            # Base 1; if length 9+ AND no one has guessed yet → up to 2 letters
-            base = 1
-            extra = 1 if (word_len >= 9 and not game_state.current_round["correct_guessers"]) else 0
-            reveal_random_letters(base + extra)
-
-        elif label == "25":
-            # Reveal at 25 seconds remaining:
-            # Base 1; if length 9+ → up to 2 letters
-            base = 1
-            extra = 1 if word_len >= 9 else 0
-            reveal_random_letters(base + extra)
+        schedule_for_round(
+            game_state,
+            elapsed_target,
+            time_reveal,
+            game_state,
+            game_state.round_version,
+            label,
+            word_len
+        )
+
+
+def time_reveal(game_state, round_version: int, label: str, word_len: int):
+    # If round ended or a new round started, do nothing
+    if not game_state.current_round["active"] or game_state.round_version != round_version:
+        return
+
+    # Decide how many letters to reveal per timing rule
+    if label == "75":
+        # Reveal at 75 seconds remaining → 1 letter
+        reveal_random_letters(game_state, 1)
+
+    elif label == "50":
+        # Reveal at 50 seconds remaining:
+        # Base 1; if length 9+ AND no one has guessed yet → up to 2 letters
+        base = 1
+        extra = 1 if (word_len >= 9 and not game_state.current_round["correct_guessers"]) else 0
+        reveal_random_letters(game_state, base + extra)
+
+    elif label == "25":
+        # Reveal at 25 seconds remaining:
+        # Base 1; if length 9+ → up to 2 letters
+        base = 1
+        extra = 1 if word_len >= 9 else 0
+        reveal_random_letters(game_state, base + extra)
@@ -0,0 +1,46 @@
+#  Per-lobby group rooms for round fan-out
+from extensions.socketio import socketio
+
+# Every player of a lobby sits in exactly one of these during a round, so prompts,
+# reveals and zoned chat go out as one emit per group instead of one per player.
+
+
+def drawer_room(lobby_id) -> str:
+    return f"{lobby_id}:drawer"
+
+
+def guessing_room(lobby_id) -> str:
+    """Guessers who have not found the word yet (everyone, between rounds)."""
+    return f"{lobby_id}:guessing"
+
+
+def solved_room(lobby_id) -> str:
+    return f"{lobby_id}:solved"
+
+
+def group_rooms(lobby_id) -> tuple:
+    return drawer_room(lobby_id), guessing_room(lobby_id), solved_room(lobby_id)
+
+
+def _group_for(game_state, sid):
+    if sid == game_state.current_round["drawer"]:
+        return drawer_room(game_state.lobby_id)
+    if sid in game_state.current_round["correct_guessers"]:
+        return solved_room(game_state.lobby_id)
+    return guessing_room(game_state.lobby_id)
+
+
+def place_player(game_state, sid):
+    """Moves one player connected to this process into the group matching the round."""
+    target = _group_for(game_state, sid)
+    for room in group_rooms(game_state.lobby_id):
+        if room == target:
+            socketio.server.enter_room(sid, room, namespace="/")
+        else:
+            socketio.server.leave_room(sid, room, namespace="/")
+
+
+def place_players(game_state, sids):
+    """Called on round changes; sids are the lobby's players connected to this process."""
+    for sid in sids:
+        place_player(game_state, sid)
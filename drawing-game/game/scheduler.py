@@ -0,0 +1,136 @@
+#  Process-wide timer wheel for round events
+import os
+import time
+from extensions.socketio import socketio
+
+# Wheel resolution; round events only need to be roughly on time
+SCHEDULER_TICK_SECONDS = float(os.getenv("SCHEDULER_TICK_MS", "100")) / 1000
+SCHEDULER_SLOTS = 1024
+
+
+class Timer:
+    __slots__ = ("callback", "args", "rounds", "slot", "wheel")
+
+    def __init__(self, wheel, slot, rounds, callback, args):
+        self.wheel = wheel
+        self.slot = slot
+        self.rounds = rounds
+        self.callback = callback
+        self.args = args
+
+    @property
+    def active(self):
+        return self.slot is not None
+
+    def cancel(self):
+        """O(1): drops the timer from its slot. Cancelling twice or after it fired is a no-op."""
+        if self.slot is None:
+            return
+        self.wheel._slots[self.slot].discard(self)
+        self.wheel._pending -= 1
+        self.wheel.cancelled += 1
+        self.slot = None
+
+
+class TimerWheel:
+    """
+    Hashed timing wheel: every timed event of every lobby in one greenlet.
+
+    Scheduling and cancelling are O(1). Each tick the greenlet looks at a single slot,
+    firing timers that are due and counting down the laps of those scheduled more
+    than one revolution ahead. The greenlet exits when nothing is pending and
+    is started again by the next call_later().
+    """
+
+    def __init__(self, tick=SCHEDULER_TICK_SECONDS, slots=SCHEDULER_SLOTS):
+        self.tick = tick
+        self._slots = [set() for _ in range(slots)]
+        self._cursor = 0
+        self._pending = 0
+        self._running = False
+
+        self.fired = 0
+        self.cancelled = 0
+        self.late_ticks = 0
+
+    def __len__(self):
+        return self._pending
+
+    def call_later(self, delay, callback, *args) -> Timer:
+        ticks = max(1, int(round(delay / self.tick)))
+        # The slot under the cursor is processed first, so offset by one less
+        rounds, offset = divmod(ticks - 1, len(self._slots))
+        slot = (self._cursor + offset) % len(self._slots)
+
+        timer = Timer(self, slot, rounds, callback, args)
+        self._slots[slot].add(timer)
+        self._pending += 1
+
+        if not self._running:
+            self._running = True
+            socketio.start_background_task(self._run)
+        return timer
+
+    def _run(self):
+        next_tick = time.monotonic() + self.tick
+        try:
+            while self._pending:
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    socketio.sleep(delay)
+                elif delay < -self.tick:
+                    self.late_ticks += 1
+
+                next_tick += self.tick
+                self._advance()
+        finally:
+            self._running = False
+
+    def _advance(self):
+        slot = self._cursor
+        self._cursor = (self._cursor + 1) % len(self._slots)
+
+        due = []
+        for timer in self._slots[slot]:
+            if timer.rounds:
+                timer.rounds -= 1
+            else:
+                due.append(timer)
+
+        for timer in due:
+            if timer.slot is None:
+                continue  # cancelled by an earlier callback in this tick
+            self._slots[slot].discard(timer)
+            self._pending -= 1
+            timer.slot = None
+            self.fired += 1
+            try:
+                timer.callback(*timer.args)
+            except Exception as e:
+                print(f"Scheduled {getattr(timer.callback, '__name__', timer.callback)} failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._pending,
+            "fired": self.fired,
+            "cancelled": self.cancelled,
+            "late_ticks": self.late_ticks,
+            "tick_ms": self.tick * 1000,
+        }
+
+
+def schedule_for_round(game_state, delay, callback, *args):
+    """Schedules a timer that is cancelled along with the lobby's current round."""
+    timer = scheduler.call_later(delay, callback, *args)
+    game_state.round_timers.append(timer)
+    return timer
+
+
+def cancel_round_timers(game_state):
+    for timer in game_state.round_timers:
+        timer.cancel()
+    game_state.round_timers = []
+
+
+# SINGLE WHEEL FOR EVERY LOBBY IN THIS PROCESS
+scheduler = TimerWheel()
@@ -0,0 +1,91 @@
+#  Versioned scoreboard updates
+#
+#  Clients keep their own copy of the scoreboard and apply small events to it:
+#
+#      scoreboardSync  {"seq", "players": [{"id", "name", "avatar", "score"}, ...]}   (to one client)
+#      playerJoined    {"seq", "player": {"id", "name", "avatar", "score"}}
+#      playerLeft      {"seq", "id"}
+#      scoreDelta      {"seq", "scores": [[id, score], ...]}   (absolute scores)
+#
+#  Every broadcast bumps the lobby's seq by one. A client that sees a gap asks for
+#  a fresh scoreboardSync with "scoreboardResync".
+import os
+from extensions.socketio import socketio
+from game.state import lobbies
+from game.scheduler import scheduler
+
+# Score changes within this window go out as one scoreDelta
+SCORE_COALESCE_SECONDS = float(os.getenv("SCORE_COALESCE_MS", "250")) / 1000
+
+
+def _entry(player) -> dict:
+    return {
+        "id": player["id"],
+        "name": player["name"],
+        "avatar": player["avatar"],
+        "score": player["score"]
+    }
+
+
+def _next_seq(game_state) -> int:
+    return lobbies.store.next_counter(game_state, "scoreboard_seq")
+
+
+def send_scoreboard(game_state, sid):
+    """Full snapshot for one client (join, or a gap in its seq)."""
+    flush_scores(game_state)
+    socketio.emit("scoreboardSync", {
+        "seq": game_state.counters.get("scoreboard_seq", 0),
+        "players": [_entry(p) for p in game_state.players.values()]
+    }, room=sid)
+
+
+def player_joined(game_state, sid):
+    """Call once the player is in game_state.players."""
+    player = game_state.players[sid]
+    player["id"] = lobbies.store.next_counter(game_state, "player_id")
+    lobbies.store.save_player(game_state, sid)
+
+    flush_scores(game_state)
+    socketio.emit("playerJoined", {
+        "seq": _next_seq(game_state),
+        "player": _entry(player)
+    }, room=game_state.lobby_id, skip_sid=sid)
+    send_scoreboard(game_state, sid)
+
+
+def player_left(game_state, player):
+    """player is the entry just removed from game_state.players."""
+    game_state.pending_scores.pop(player["id"], None)
+    flush_scores(game_state)
+    socketio.emit("playerLeft", {
+        "seq": _next_seq(game_state),
+        "id": player["id"]
+    }, room=game_state.lobby_id)
+
+
+def score_changed(game_state, sid):
+    """Queues a player's new score; a burst of guesses becomes one scoreDelta."""
+    player = game_state.players.get(sid)
+    if player is None:
+        return
+
+    game_state.pending_scores[player["id"]] = player["score"]
+    if game_state.score_flush_timer is None:
+        game_state.score_flush_timer = scheduler.call_later(SCORE_COALESCE_SECONDS, flush_scores, game_state)
+
+
+def flush_scores(game_state):
+    if game_state.score_flush_timer is not None:
+        game_state.score_flush_timer.cancel()
+        game_state.score_flush_timer = None
+
+    if not game_state.pending_scores:
+        return
+
+    scores = [[pid, score] for pid, score in game_state.pending_scores.items()]
+    game_state.pending_scores = {}
+    socketio.emit("scoreDelta", {
+        "seq": _next_seq(game_state),
+        "scores": scores
+    }, room=game_state.lobby_id)
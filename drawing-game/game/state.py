@@ -1,19 +1,57 @@
 # state.py
-from services.PackService import pack_service
+import os
+import time
+from array import array
+from game.words import word_tables, ShuffleBag, DEFAULT_PACK
+from game.canvas import CanvasHistory, STROKE_QUALITY_TOLERANCE, DEFAULT_STROKE_QUALITY
+from game.store import create_lobby_store
+from game.rooms import place_players
+from game.scheduler import scheduler
+
+DEFAULT_LOBBY = "main"
+MAX_LOBBY_ID_LENGTH = 64
+
+# With a shared store, canvas changes are written back at most this often
+CANVAS_SAVE_SECONDS = float(os.getenv("CANVAS_SAVE_MS", "1000")) / 1000
+
+def resolve_stroke_quality(quality) -> str:
+    if quality in STROKE_QUALITY_TOLERANCE:
+        return quality
+    env_quality = os.getenv("STROKE_QUALITY", DEFAULT_STROKE_QUALITY)
+    return env_quality if env_quality in STROKE_QUALITY_TOLERANCE else DEFAULT_STROKE_QUALITY
+
 
 class GameState:
-    def __init__(self):
-        self.CURRENT_PACK = "standard-pack"
-        self.words = pack_service.get_pack(self.CURRENT_PACK)["words"]
+    def __init__(self, lobby_id=DEFAULT_LOBBY, stroke_quality=None, pack_name=None):
+        self.lobby_id = lobby_id
+
+        # Prompts come from a shared word table, drawn without repeats per lobby
+        self.word_bag = self._make_word_bag(pack_name)
 
         self.players = {}
         self.players_order = []
         self.current_drawer_index = 0
         self.ROUND_TOTAL_SECONDS = 100
 
-        self.canvas_history = []
+        # Stored/replayed stroke fidelity: lossless | high | medium | low
+        self.stroke_quality = resolve_stroke_quality(stroke_quality)
+        self.canvas_history = CanvasHistory(STROKE_QUALITY_TOLERANCE[self.stroke_quality])
+        self.checkpoint_building = False
+
+        # Draw points waiting for the next drawBatch, see game/batching.py
+        self.pending_points = array("H")
+        self.pending_sid = None
+        self.batch_flush_scheduled = False
+
+        # Drawer over its stroke budget: relays wait for one snapshot, see game/ratelimit.py
+        self.relay_paused = False
+
+        # Players that negotiated the binary wire format at join, see game/wire.py.
+        # With a shared store this includes players connected to other processes
+        self.binary_sids = set()
 
         self.current_round = {
+            "phase": "idle",  # idle | countdown | drawing, see game/manager.py
             "drawer": None,
             "prompt": None,
             "active": False,
@@ -24,5 +62,257 @@ class GameState:
             "guess_reveals_done": 0,
         }
 
-# SINGLE SHARED INSTANCE IMPORTED EVERYWHERE
-game_state = GameState()
+        # Bumped by every committed round transition, see game/store.py
+        self.round_version = 0
+
+        # Scheduler timers of the current round (countdown, reveals, expiry), and the
+        # round_version they were scheduled for, see watch_rounds() in game/manager.py
+        self.round_timers = []
+        self.timers_version = None
+
+        # Last lobbies.sync(), and the pending coalesced canvas write
+        self.synced_at = 0.0
+        self.canvas_save_timer = None
+
+        # Normalized prompt and aliases of the current round, see game/guessing.py
+        self.guess_matcher = None
+
+        # scoreboard_seq / player_id, see game/scoreboard.py
+        self.counters = {}
+        self.pending_scores = {}
+        self.score_flush_timer = None
+
+    @staticmethod
+    def _make_word_bag(pack_name):
+        try:
+            return ShuffleBag(word_tables, pack_name or DEFAULT_PACK)
+        except LookupError:
+            return ShuffleBag(word_tables, DEFAULT_PACK)
+
+    @property
+    def CURRENT_PACK(self):
+        return self.word_bag.pack_name
+
+    def set_pack(self, pack_name):
+        """Switches the lobby's pack. Raises LookupError if it does not exist."""
+        if pack_name != self.CURRENT_PACK:
+            self.word_bag = ShuffleBag(word_tables, pack_name)
+
+    # ---------- shared-store documents ----------
+
+    def player_document(self, sid) -> dict:
+        player = dict(self.players[sid])
+        if "canvas_size" in player:
+            player["canvas_size"] = list(player["canvas_size"])
+        return player
+
+    def round_document(self) -> dict:
+        round_doc = dict(self.current_round)
+        round_doc["correct_guessers"] = sorted(round_doc["correct_guessers"])
+        round_doc["revealed_indices"] = sorted(round_doc["revealed_indices"])
+        return round_doc
+
+    def to_document(self) -> dict:
+        return {
+            "stroke_quality": self.stroke_quality,
+            "pack": self.CURRENT_PACK,
+            "players": {sid: self.player_document(sid) for sid in self.players},
+            "players_order": list(self.players_order),
+            "current_drawer_index": self.current_drawer_index,
+            "round": self.round_document(),
+            "round_version": self.round_version,
+            "counters": dict(self.counters),
+            "canvas": self.canvas_history.to_document(),
+            "canvas_version": self.canvas_history.version,
+        }
+
+    def apply_document(self, doc, keep_canvas=False):
+        """
+        Replaces shared state with a stored lobby document.
+        keep_canvas leaves the local canvas alone (this process holds the drawer,
+        so its history is ahead of the stored one).
+        """
+        self.players = {}
+        for sid, player in doc.get("players", {}).items():
+            player = dict(player)
+            if "canvas_size" in player:
+                player["canvas_size"] = tuple(player["canvas_size"])
+            self.players[sid] = player
+        self.binary_sids = {sid for sid, player in self.players.items() if player.get("binary")}
+
+        if doc.get("pack") and doc["pack"] != self.CURRENT_PACK:
+            self.word_bag = self._make_word_bag(doc["pack"])
+
+        self.players_order = list(doc.get("players_order", []))
+        self.current_drawer_index = doc.get("current_drawer_index", 0)
+        self.round_version = doc.get("round_version", 0)
+        self.counters = dict(doc.get("counters") or {})
+
+        round_doc = dict(doc.get("round") or {})
+        round_doc["correct_guessers"] = set(round_doc.get("correct_guessers", []))
+        round_doc["revealed_indices"] = set(round_doc.get("revealed_indices", []))
+        self.current_round.update(round_doc)
+
+        canvas = doc.get("canvas")
+        if not keep_canvas and canvas and canvas.get("version") != self.canvas_history.version:
+            self.canvas_history = CanvasHistory.from_document(canvas)
+
+
+class LobbyRegistry:
+    """
+    Keeps one GameState per lobby ID and remembers which lobby each sid joined.
+    The lobby ID doubles as the Socket.IO room name for that lobby.
+    """
+
+    def __init__(self, store=None):
+        self.lobbies = {}
+        self.sid_to_lobby = {}
+
+        # Where lobby state is shared with other worker processes, if anywhere.
+        # Built on first use so importing this module never opens a connection.
+        self._store = store
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = create_lobby_store()
+        return self._store
+
+    def normalize_id(self, lobby_id) -> str:
+        if not isinstance(lobby_id, str):
+            return DEFAULT_LOBBY
+        lobby_id = lobby_id.strip()[:MAX_LOBBY_ID_LENGTH]
+        return lobby_id or DEFAULT_LOBBY
+
+    def get(self, lobby_id):
+        return self.lobbies.get(lobby_id)
+
+    def get_or_create(self, lobby_id, stroke_quality=None, pack_name=None):
+        """stroke_quality and pack_name only apply when this call creates the lobby."""
+        game_state = self.lobbies.get(lobby_id)
+        if game_state is not None:
+            if self.local_sids(game_state) or not self.store.shared:
+                return game_state
+            # Nobody here is playing in it, so it may be long gone from the store; read it afresh
+            self.drop(lobby_id)
+
+        # Another worker process may already be running this lobby
+        doc = self.store.load(lobby_id)
+        if doc is not None:
+            doc["canvas"] = self.store.load_canvas(lobby_id)
+            game_state = GameState(lobby_id, doc.get("stroke_quality"))
+            game_state.apply_document(doc)
+        else:
+            game_state = GameState(lobby_id, stroke_quality, pack_name)
+            doc = self.store.create(game_state)
+            if doc is not None:
+                game_state.apply_document(doc)
+
+        self.lobbies[lobby_id] = game_state
+        print(f"Lobby {lobby_id} created. Active lobbies: {len(self.lobbies)}")
+        return game_state
+
+    def sync(self, game_state, with_canvas=False):
+        """
+        Pulls the latest shared state for a lobby before acting on it.
+        The canvas is only fetched if with_canvas is set and it changed since
+        this process last saw it. A no-op with the in-memory store.
+        """
+        doc = self.store.load(game_state.lobby_id)
+        if doc is None:
+            if self.store.shared:
+                self._orphaned(game_state)
+            return game_state
+        game_state.synced_at = time.monotonic()
+
+        drawer_is_local = game_state.current_round["drawer"] in self.sid_to_lobby
+        if with_canvas and not drawer_is_local and doc.get("canvas_version") != game_state.canvas_history.version:
+            doc["canvas"] = self.store.load_canvas(game_state.lobby_id)
+
+        round_version = game_state.round_version
+        game_state.apply_document(doc, keep_canvas=drawer_is_local)
+
+        # Another process moved the round on: regroup our own connections
+        if game_state.round_version != round_version:
+            place_players(game_state, self.local_sids(game_state))
+        return game_state
+
+    def _orphaned(self, game_state):
+        """
+        The lobby's document was deleted by another process. Without local players
+        the lobby is let go of; otherwise it is stored again with just those players.
+        """
+        local = set(self.local_sids(game_state))
+        if not local:
+            self.drop(game_state.lobby_id)
+            return
+
+        game_state.players = {sid: player for sid, player in game_state.players.items() if sid in local}
+        game_state.players_order = [sid for sid in game_state.players_order if sid in local]
+        game_state.binary_sids &= local
+        game_state.current_drawer_index %= len(game_state.players_order) or 1
+        doc = self.store.create(game_state)
+        if doc is not None:
+            game_state.apply_document(doc)
+
+    def canvas_changed(self, game_state):
+        """
+        Queues a write of the lobby's canvas. Strokes, dots and fills arrive many
+        times a second; the store gets the packed canvas once per CANVAS_SAVE_SECONDS.
+        """
+        if not self.store.shared or game_state.canvas_save_timer is not None:
+            return
+        game_state.canvas_save_timer = scheduler.call_later(CANVAS_SAVE_SECONDS, self._save_canvas, game_state)
+
+    def _save_canvas(self, game_state):
+        game_state.canvas_save_timer = None
+        if self.lobbies.get(game_state.lobby_id) is game_state:
+            self.store.save_canvas(game_state)
+
+    def local_sids(self, game_state):
+        """Players of this lobby connected to this process."""
+        return [sid for sid in game_state.players if self.sid_to_lobby.get(sid) == game_state.lobby_id]
+
+    def bind(self, sid, lobby_id):
+        self.sid_to_lobby[sid] = lobby_id
+
+    def unbind(self, sid):
+        lobby_id = self.sid_to_lobby.pop(sid, None)
+        return self.lobbies.get(lobby_id)
+
+    def for_sid(self, sid):
+        lobby_id = self.sid_to_lobby.get(sid)
+        if lobby_id is None:
+            return None
+        return self.lobbies.get(lobby_id)
+
+    def drop(self, lobby_id):
+        """
+        Forgets a lobby in this process only, e.g. once its last local player left
+        while others play on through other processes. The stored document stays.
+        """
+        game_state = self.lobbies.pop(lobby_id, None)
+        if game_state is not None:
+            # Stops any scheduled callback still holding this lobby
+            game_state.current_round["active"] = False
+            for timer in game_state.round_timers:
+                timer.cancel()
+            if game_state.score_flush_timer is not None:
+                game_state.score_flush_timer.cancel()
+            if game_state.canvas_save_timer is not None:
+                game_state.canvas_save_timer.cancel()
+                game_state.canvas_save_timer = None
+                self.store.save_canvas(game_state)
+        return game_state
+
+    def remove(self, lobby_id):
+        """Closes a lobby for good: the last player anywhere has left."""
+        game_state = self.drop(lobby_id)
+        if game_state is not None:
+            self.store.delete(lobby_id)
+            print(f"Lobby {lobby_id} closed. Active lobbies: {len(self.lobbies)}")
+        return game_state
+
+
+# SINGLE SHARED REGISTRY IMPORTED EVERYWHERE
+lobbies = LobbyRegistry()
@@ -0,0 +1,235 @@
+#  Lobby state backends
+import os
+
+# LOBBY_STORE=memory (default) keeps lobbies in this process only.
+# LOBBY_STORE=mongo shares them between worker processes through a "lobbies" collection.
+LOBBY_STORE = os.getenv("LOBBY_STORE", "memory")
+
+
+class LobbyStore:
+    """
+    What the game needs from a place that holds lobby state shared between processes:
+    players, turn order, the current round and the canvas history.
+
+    Round transitions (a new round starting, a lobby reset) go through commit_round(),
+    which only succeeds if nobody else moved the round on since this process last
+    saw it. A False return means the caller lost the race and must reload.
+    """
+
+    # False if this process holds the only copy and there is nothing to sync
+    shared = True
+
+    def load(self, lobby_id):
+        """Returns the stored lobby document without its canvas, or None."""
+        raise NotImplementedError
+
+    def load_canvas(self, lobby_id):
+        """Returns the stored canvas document, or None."""
+        raise NotImplementedError
+
+    def create(self, game_state):
+        """
+        Stores a fresh lobby. Returns the existing document instead if another
+        process created it first, or None if this call created it.
+        """
+        raise NotImplementedError
+
+    def add_player(self, game_state, sid):
+        raise NotImplementedError
+
+    def remove_player(self, game_state, sid):
+        raise NotImplementedError
+
+    def save_player(self, game_state, sid):
+        """Writes back one player's entry (score, canvas size)."""
+        raise NotImplementedError
+
+    def update_round(self, game_state, *keys):
+        """Writes back some current_round keys without moving the round on."""
+        raise NotImplementedError
+
+    def commit_round(self, game_state) -> bool:
+        """Stores current_round and the drawer index as the next round_version."""
+        raise NotImplementedError
+
+    def save_canvas(self, game_state):
+        raise NotImplementedError
+
+    def save_pack(self, game_state):
+        raise NotImplementedError
+
+    def next_counter(self, game_state, name) -> int:
+        """Increments one of the lobby's counters and returns the new value."""
+        raise NotImplementedError
+
+    def delete(self, lobby_id):
+        raise NotImplementedError
+
+
+class MemoryLobbyStore(LobbyStore):
+    """
+    Single-process backend: the GameState objects in the registry are the only copy,
+    so there is nothing to load or write back and no other writer to race against.
+    """
+
+    shared = False
+
+    def load(self, lobby_id):
+        return None
+
+    def load_canvas(self, lobby_id):
+        return None
+
+    def create(self, game_state):
+        return None
+
+    def add_player(self, game_state, sid):
+        pass
+
+    def remove_player(self, game_state, sid):
+        pass
+
+    def save_player(self, game_state, sid):
+        pass
+
+    def update_round(self, game_state, *keys):
+        pass
+
+    def commit_round(self, game_state) -> bool:
+        game_state.round_version += 1
+        return True
+
+    def save_canvas(self, game_state):
+        pass
+
+    def save_pack(self, game_state):
+        pass
+
+    def next_counter(self, game_state, name) -> int:
+        game_state.counters[name] = game_state.counters.get(name, 0) + 1
+        return game_state.counters[name]
+
+    def delete(self, lobby_id):
+        pass
+
+
+class MongoLobbyStore(LobbyStore):
+    """
+    Shared backend: one document per lobby, keyed by lobby ID.
+
+    Takes any pymongo-compatible collection, so a local stand-in such as
+    mongomock.MongoClient().db.lobbies works for testing. Player changes are
+    single-field updates, so joins and leaves handled by different processes
+    do not overwrite each other.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def load(self, lobby_id):
+        # The packed canvas is the bulk of the document; it is fetched on its own when it changed
+        return self.collection.find_one({"_id": lobby_id}, {"canvas": 0})
+
+    def load_canvas(self, lobby_id):
+        doc = self.collection.find_one({"_id": lobby_id}, {"_id": 0, "canvas": 1})
+        return doc.get("canvas") if doc else None
+
+    def create(self, game_state):
+        from pymongo.errors import DuplicateKeyError
+
+        doc = game_state.to_document()
+        doc["_id"] = game_state.lobby_id
+        try:
+            self.collection.insert_one(doc)
+        except DuplicateKeyError:
+            existing = self.load(game_state.lobby_id)
+            if existing is not None:
+                existing["canvas"] = self.load_canvas(game_state.lobby_id)
+            return existing
+        return None
+
+    def add_player(self, game_state, sid):
+        self.collection.update_one({"_id": game_state.lobby_id}, {
+            "$set": {f"players.{sid}": game_state.player_document(sid)},
+            "$addToSet": {"players_order": sid},
+        })
+
+    def remove_player(self, game_state, sid):
+        self.collection.update_one({"_id": game_state.lobby_id}, {
+            "$unset": {f"players.{sid}": ""},
+            "$pull": {"players_order": sid},
+            "$set": {"current_drawer_index": game_state.current_drawer_index},
+        })
+
+    def save_player(self, game_state, sid):
+        if sid not in game_state.players:
+            return
+        self.collection.update_one(
+            {"_id": game_state.lobby_id},
+            {"$set": {f"players.{sid}": game_state.player_document(sid)}}
+        )
+
+    def update_round(self, game_state, *keys):
+        # A process still holding an older round must not write into the new one
+        round_doc = game_state.round_document()
+        self.collection.update_one(
+            {"_id": game_state.lobby_id, "round_version": game_state.round_version},
+            {"$set": {f"round.{key}": round_doc[key] for key in keys}}
+        )
+
+    def commit_round(self, game_state) -> bool:
+        result = self.collection.update_one(
+            {"_id": game_state.lobby_id, "round_version": game_state.round_version},
+            {
+                "$set": {
+                    "round": game_state.round_document(),
+                    "current_drawer_index": game_state.current_drawer_index,
+                },
+                "$inc": {"round_version": 1},
+            }
+        )
+        if result.matched_count == 0:
+            return False
+
+        game_state.round_version += 1
+        return True
+
+    def save_canvas(self, game_state):
+        self.collection.update_one(
+            {"_id": game_state.lobby_id},
+            {"$set": {
+                "canvas": game_state.canvas_history.to_document(),
+                "canvas_version": game_state.canvas_history.version,
+            }}
+        )
+
+    def save_pack(self, game_state):
+        self.collection.update_one(
+            {"_id": game_state.lobby_id},
+            {"$set": {"pack": game_state.CURRENT_PACK}}
+        )
+
+    def next_counter(self, game_state, name) -> int:
+        # Atomic, so every process hands out the same sequence
+        from pymongo import ReturnDocument
+
+        doc = self.collection.find_one_and_update(
+            {"_id": game_state.lobby_id},
+            {"$inc": {f"counters.{name}": 1}},
+            projection={"_id": 0, f"counters.{name}": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        value = doc["counters"][name] if doc else game_state.counters.get(name, 0) + 1
+        game_state.counters[name] = value
+        return value
+
+    def delete(self, lobby_id):
+        # Only once no process has anyone left in it
+        self.collection.delete_one({"_id": lobby_id, "players_order": {"$size": 0}})
+
+
+def create_lobby_store():
+    if LOBBY_STORE == "mongo":
+        from database.Connection import Connection
+        return MongoLobbyStore(Connection().db["lobbies"])
+    return MemoryLobbyStore()
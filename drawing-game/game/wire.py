@@ -0,0 +1,190 @@
+#  Binary wire format for drawing events
+#
+#  Clients that send {"binary": true} in join exchange drawing events as one
+#  "drawBin" event carrying a packed little-endian frame instead of JSON:
+#
+#      startPath / dot   u8 op, u16 x, u16 y, u16 size, u8 tool, u8 color_len, color (utf-8)
+#      fill              u8 op, u16 x, u16 y, u8 color_len, color (utf-8)
+#      draw              u8 op, u16 x, u16 y
+#      drawBatch         u8 op, then u16 x, u16 y pairs
+#      endPath           u8 op
+#
+#  JSON stays the default, and a lobby can mix both kinds of clients.
+import struct
+import sys
+from array import array
+from extensions.socketio import socketio
+from game.canvas import to_coord
+
+OP_START_PATH = 1
+OP_DOT = 2
+OP_FILL = 3
+OP_DRAW = 4
+OP_DRAW_BATCH = 5
+OP_END_PATH = 6
+
+OP_BY_EVENT = {
+    "startPath": OP_START_PATH,
+    "dot": OP_DOT,
+    "fill": OP_FILL,
+    "draw": OP_DRAW,
+    "drawBatch": OP_DRAW_BATCH,
+    "endPath": OP_END_PATH,
+}
+EVENT_BY_OP = {op: event_type for event_type, op in OP_BY_EVENT.items()}
+
+TOOLS = ("brush", "eraser", "fill")
+
+_POINT = struct.Struct("<HH")
+_STYLED_POINT = struct.Struct("<HHHB")
+
+
+def binary_room(lobby_id) -> str:
+    return f"{lobby_id}:bin"
+
+
+def json_room(lobby_id) -> str:
+    return f"{lobby_id}:json"
+
+
+def _read_color(frame, offset):
+    length = frame[offset]
+    color = bytes(frame[offset + 1:offset + 1 + length])
+    if len(color) != length:
+        raise ValueError("Truncated color")
+    return color.decode("utf-8", "replace")
+
+
+def _color_bytes(color):
+    return str(color).encode("utf-8")[:255]
+
+
+def decode_frame(frame):
+    """
+    Returns (event_type, fields) where fields is a plain tuple:
+    startPath/dot -> (x, y, size, color, tool), fill -> (x, y, color),
+    draw -> (x, y), drawBatch -> array('H') of x, y pairs, endPath -> ().
+    Raises ValueError on a malformed frame.
+    """
+    if not isinstance(frame, (bytes, bytearray, memoryview)) or not frame:
+        raise ValueError("Empty frame")
+
+    frame = memoryview(frame)
+    event_type = EVENT_BY_OP.get(frame[0])
+
+    try:
+        if event_type in ("startPath", "dot"):
+            x, y, size, tool = _STYLED_POINT.unpack_from(frame, 1)
+            color = _read_color(frame, 1 + _STYLED_POINT.size)
+            return event_type, (x, y, size, color, TOOLS[tool] if tool < len(TOOLS) else TOOLS[0])
+
+        if event_type == "fill":
+            x, y = _POINT.unpack_from(frame, 1)
+            return event_type, (x, y, _read_color(frame, 1 + _POINT.size))
+
+        if event_type == "draw":
+            return event_type, _POINT.unpack_from(frame, 1)
+
+        if event_type == "drawBatch":
+            points = array("H", frame[1:1 + (len(frame) - 1) // 4 * 4].tobytes())
+            if sys.byteorder == "big":
+                points.byteswap()
+            return event_type, points
+
+        if event_type == "endPath":
+            return event_type, ()
+    except (struct.error, IndexError) as e:
+        raise ValueError(str(e))
+
+    raise ValueError("Unknown op")
+
+
+def encode_frame(event_type, fields) -> bytes:
+    op = bytes((OP_BY_EVENT[event_type],))
+
+    if event_type in ("startPath", "dot"):
+        x, y, size, color, tool = fields
+        tool_idx = TOOLS.index(tool) if tool in TOOLS else 0
+        color = _color_bytes(color)
+        return op + _STYLED_POINT.pack(x, y, size, tool_idx) + bytes((len(color),)) + color
+
+    if event_type == "fill":
+        x, y, color = fields
+        color = _color_bytes(color)
+        return op + _POINT.pack(x, y) + bytes((len(color),)) + color
+
+    if event_type == "draw":
+        return op + _POINT.pack(*fields)
+
+    if event_type == "drawBatch":
+        points = array("H", fields)
+        if sys.byteorder == "big":
+            points.byteswap()
+        return op + points.tobytes()
+
+    return op
+
+
+def payload_to_fields(event_type, data):
+    """JSON payload -> validated fields tuple, or None if it cannot be encoded."""
+    if event_type == "endPath":
+        return ()
+    if not isinstance(data, dict):
+        return None
+
+    x, y = to_coord(data.get("x")), to_coord(data.get("y"))
+    if x is None or y is None:
+        return None
+
+    if event_type in ("startPath", "dot"):
+        size = to_coord(data.get("size"))
+        return x, y, size or 0, data.get("color"), data.get("tool")
+    if event_type == "fill":
+        return x, y, data.get("color")
+    if event_type == "draw":
+        return x, y
+    return None
+
+
+def fields_to_payload(event_type, fields):
+    """fields tuple -> the JSON payload older clients expect."""
+    if event_type in ("startPath", "dot"):
+        x, y, size, color, tool = fields
+        return {"x": x, "y": y, "size": size, "color": color, "tool": tool}
+    if event_type == "fill":
+        x, y, color = fields
+        return {"x": x, "y": y, "color": color}
+    if event_type == "draw":
+        x, y = fields
+        return {"x": x, "y": y}
+    if event_type == "drawBatch":
+        return {"points": fields.tolist()}
+    return {}
+
+
+def relay_draw_event(game_state, event_type, skip_sid, payload=None, frame=None, fields=None):
+    """
+    Sends one drawing event to everyone else in the lobby, in each client's wire format.
+    Whatever encoding arrived is forwarded untouched; the other one is only
+    built if somebody in the lobby actually needs it.
+    """
+    binary_count = len(game_state.binary_sids - {skip_sid})
+    json_count = len(game_state.players) - len(game_state.binary_sids)
+    if skip_sid in game_state.players and skip_sid not in game_state.binary_sids:
+        json_count -= 1
+
+    if binary_count > 0:
+        if frame is None:
+            if fields is None:
+                fields = payload_to_fields(event_type, payload)
+            if fields is not None:
+                frame = encode_frame(event_type, fields)
+        if frame is not None:
+            socketio.emit("drawBin", frame, room=binary_room(game_state.lobby_id), skip_sid=skip_sid)
+
+    if json_count > 0:
+        if payload is None:
+            if fields is None:
+                _, fields = decode_frame(frame)
+            payload = fields_to_payload(event_type, fields)
+        socketio.emit(event_type, payload, room=json_room(game_state.lobby_id), skip_sid=skip_sid)
@@ -0,0 +1,161 @@
+#  Word tables shared across lobbies and per-lobby shuffle bags
+import os
+import random
+import time
+from services.PackService import get_pack_service
+
+DEFAULT_PACK = "standard-pack"
+
+# How long a table is trusted before it is re-read (picks up edits made by other processes)
+WORD_TABLE_TTL = float(os.getenv("WORD_TABLE_TTL", os.getenv("PACK_CACHE_TTL", "60")))
+
+
+class WordTable:
+    """One immutable snapshot of a pack's words. Lobbies on the same pack share it."""
+
+    __slots__ = ("name", "words", "aliases", "_raw_aliases", "version", "loaded_at")
+
+    def __init__(self, name, words, version=0, aliases=None):
+        if not isinstance(aliases, dict):
+            aliases = {}
+        self.name = name
+        self.words = tuple(dict.fromkeys(w for w in words if isinstance(w, str) and w.strip()))
+        # Optional pack "aliases": word -> other spellings accepted as a correct guess
+        self.aliases = {
+            word: tuple(a for a in alts if isinstance(a, str))
+            for word, alts in aliases.items() if isinstance(alts, list)
+        }
+        self._raw_aliases = aliases
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+    def changed(self, added=(), removed=()):
+        """New table with the given words removed and added ones appended, keeping order."""
+        removed = set(removed)
+        words = [w for w in self.words if w not in removed]
+        words += [w for w in added if w not in removed]
+        return WordTable(self.name, words, self.version + 1, self._raw_aliases)
+
+
+class WordTableRegistry:
+    """
+    pack name -> current WordTable. Tables are loaded on first use and swapped for a
+    new one when PackService reports a change, so a running game sees pack edits.
+    """
+
+    def __init__(self, service_factory):
+        self._service_factory = service_factory
+        self._service = None
+        self.tables = {}
+
+    @property
+    def service(self):
+        # Subscribing on first use is enough: edits made before then touch no loaded table
+        if self._service is None:
+            self._service = self._service_factory()
+            self._service.subscribe(self.on_pack_changed)
+        return self._service
+
+    def get(self, name) -> WordTable:
+        """Raises LookupError if the pack does not exist."""
+        table = self.tables.get(name)
+        if table is not None and time.monotonic() - table.loaded_at < WORD_TABLE_TTL:
+            return table
+
+        pack = self.service.get_pack(name)
+        words, aliases = pack["words"], pack.get("aliases")
+        if table is None:
+            table = WordTable(name, words, aliases=aliases)
+        else:
+            table = self._diff(table, words, aliases)
+        self.tables[name] = table
+        return table
+
+    def _diff(self, table, words, aliases=None):
+        current = set(table.words)
+        fresh = set(words)
+        if (aliases or {}) != table._raw_aliases:
+            table = WordTable(table.name, table.words, table.version + 1, aliases)
+        if current == fresh:
+            table.loaded_at = time.monotonic()
+            return table
+        return table.changed(
+            added=[w for w in words if w not in current],
+            removed=current - fresh
+        )
+
+    def on_pack_changed(self, name, added=(), removed=(), reload=False):
+        table = self.tables.get(name)
+        if table is None:
+            return
+
+        if reload:
+            # Pack created/deleted: re-read on next use; lobbies keep their table until then
+            self.tables.pop(name, None)
+            return
+
+        self.tables[name] = table.changed(added, removed)
+
+
+class ShuffleBag:
+    """
+    Draws a lobby's prompts without replacement: a shuffled permutation of the pack,
+    consumed from the end and reshuffled once it runs out. When the shared table
+    changes mid-cycle, removed words leave the bag and new ones are slotted in at
+    random positions, so words already drawn this cycle still do not come back.
+    """
+
+    def __init__(self, registry, pack_name, rng=None):
+        self.registry = registry
+        self.rng = rng or random.Random()
+        self.table = registry.get(pack_name)
+        self._remaining = []
+        self._last = None
+
+    @property
+    def pack_name(self):
+        return self.table.name
+
+    def __len__(self):
+        return len(self._remaining)
+
+    def _refill(self):
+        self._remaining = list(self.table.words)
+        self.rng.shuffle(self._remaining)
+
+        # Don't repeat the previous cycle's last word back to back
+        if len(self._remaining) > 1 and self._remaining[-1] == self._last:
+            self._remaining[0], self._remaining[-1] = self._remaining[-1], self._remaining[0]
+
+    def _reconcile(self, table):
+        old_words = set(self.table.words)
+        new_words = set(table.words)
+
+        remaining = [w for w in self._remaining if w in new_words]
+        for word in table.words:
+            if word not in old_words:
+                remaining.insert(self.rng.randint(0, len(remaining)), word)
+
+        self._remaining = remaining
+        self.table = table
+
+    def draw(self):
+        """Returns the next prompt, or None if the pack has no words."""
+        try:
+            table = self.registry.get(self.table.name)
+        except LookupError:
+            table = self.table  # pack deleted: keep playing the words we have
+        if table is not self.table:
+            self._reconcile(table)
+
+        if not self._remaining:
+            self._refill()
+        if not self._remaining:
+            return None
+
+        self._last = self._remaining.pop()
+        return self._last
+
+
+# SHARED WORD TABLES FOR EVERY LOBBY IN THIS PROCESS
+word_tables = WordTableRegistry(get_pack_service)
@@ -0,0 +1,91 @@
+import os
+import time
+from collections import OrderedDict
+
+class PackCache:
+    """
+    In-process read-through cache of pack documents, keyed by pack name.
+
+    Entries expire after ttl seconds (this is what bounds staleness when other
+    processes write to the same database) and the least recently used entry is
+    evicted once max_entries is reached. PackService drops entries on its own writes.
+    Cached documents are shared between callers and must be treated as read-only.
+
+    Every invalidation also bumps the name's generation. A reader captures
+    generation(name) before going to the database and hands it to put(), which
+    then refuses to cache a document that a write may have made stale meanwhile.
+    """
+
+    def __init__(self, ttl=None, max_entries=None):
+        self.ttl = float(ttl if ttl is not None else os.getenv("PACK_CACHE_TTL", "60"))
+        self.max_entries = int(max_entries if max_entries is not None else os.getenv("PACK_CACHE_SIZE", "128"))
+        self._entries = OrderedDict()
+
+        # name -> invalidation count; _epoch is bumped by clear(), which covers every name
+        self._generations = {}
+        self._epoch = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, name):
+        entry = self._entries.get(name)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, pack = entry
+        if expires_at <= time.monotonic():
+            del self._entries[name]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(name)
+        self.hits += 1
+        return pack
+
+    def generation(self, name):
+        return self._epoch, self._generations.get(name, 0)
+
+    def put(self, name, pack, generation=None):
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        if generation is not None and generation != self.generation(name):
+            # Invalidated while the caller was reading; the next get() reads again
+            return
+
+        self._entries[name] = (time.monotonic() + self.ttl, pack)
+        self._entries.move_to_end(name)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, name):
+        self._generations[name] = self._generations.get(name, 0) + 1
+        if self._entries.pop(name, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        self._epoch += 1
+        self._generations.clear()
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
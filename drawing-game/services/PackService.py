@@ -1,57 +1,166 @@
 from database.PackCommander import PackCommander
+from database.Connection import pool_stats
+from services.PackCache import PackCache
+from pymongo.errors import DuplicateKeyError
 
 class PackService:
     def __init__(self):
         self.cmd = PackCommander()
+        self.cache = PackCache()
+        self._listeners = []
 
-    def get_all_packs(self):
-        return self.cmd.find_all_packs()
+    def subscribe(self, listener):
+        """
+        listener(pack_name, added=(), removed=(), reload=False) runs after every
+        successful write made through this service, see game/words.py.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, pack_name, **change):
+        for listener in self._listeners:
+            listener(pack_name, **change)
+
+    def iter_all_packs(self):
+        return self.cmd.iter_all_packs()
+
+    def get_pack_summaries(self, after=None, limit=50):
+        """
+        One page of {"name", "word_count"} entries. Returns (page, next_after),
+        where next_after is None on the last page.
+        """
+        # One extra row tells us whether another page follows
+        page = self.cmd.find_pack_summaries(after, limit + 1)
+        if len(page) > limit:
+            page = page[:limit]
+            return page, page[-1]["name"]
+        return page, None
 
     def create_pack(self, pack_name, words):
-        if self.cmd.find_pack(pack_name):
-            raise FileExistsError("Pack with this name already exists")
-        
+        # The unique name index rejects duplicates, see database/IndexManager.py
         pack_doc = { "name": pack_name, "words": words }
-        self.cmd.insert_pack(pack_doc)
+        try:
+            self.cmd.insert_pack(pack_doc)
+        except DuplicateKeyError:
+            raise FileExistsError("Pack with this name already exists")
+        self.cache.invalidate(pack_name)
+        self._notify(pack_name, reload=True)
 
         return True
     
     def get_pack(self, pack_name):
+        """Served from the in-process cache when possible; treat the result as read-only."""
+        pack = self.cache.get(pack_name)
+        if pack is not None:
+            return pack
+
+        # A write landing during the read invalidates first; put() then skips the stale document
+        generation = self.cache.generation(pack_name)
         pack = self.cmd.find_pack(pack_name)
 
         if pack is None:
             raise LookupError("Pack not found")
-        
+
+        self.cache.put(pack_name, pack, generation)
         return pack
     
     def delete_pack(self, pack_name):
-        pack = self.cmd.find_pack(pack_name)
-        if pack is None:
-            raise LookupError("Pack not found")
+        # The write itself tells us whether the pack existed
+        result = self.cmd.delete_pack(pack_name)
+        self.cache.invalidate(pack_name)
 
-        self.cmd.delete_pack(pack_name)
+        if result.deleted_count == 0:
+            raise LookupError("Pack not found")
 
+        self._notify(pack_name, reload=True)
         return True
     
     def add_word(self, pack_name, word):
-        pack = self.cmd.find_pack(pack_name)
-        if pack is None:
-            raise LookupError("Pack not found")
-
         if not word.strip():
             raise ValueError("Invalid word")
 
-        self.cmd.add_word(pack_name, word)
+        result = self.cmd.add_word(pack_name, word)
+        self.cache.invalidate(pack_name)
+
+        if result.matched_count == 0:
+            raise LookupError("Pack not found")
 
+        self._notify(pack_name, added=(word,))
         return True
     
     def delete_word(self, pack_name, word):
-        pack = self.cmd.find_pack(pack_name)
-        if pack is None:
+        result = self.cmd.delete_word(pack_name, word)
+        self.cache.invalidate(pack_name)
+
+        if result.matched_count == 0:
             raise LookupError("Pack not found")
-        
-        self.cmd.delete_word(pack_name, word)
 
+        self._notify(pack_name, removed=(word,))
         return True
-    
-pack_service = PackService()
\ No newline at end of file
+
+    def bulk_update_words(self, pack_name, add, remove):
+        """
+        Applies many word additions/removals with a single write.
+        Returns one {"word", "op", "status"} entry per requested word, where status is
+        added | exists | removed | missing | invalid | duplicate.
+        """
+        results = []
+        to_add, to_remove = [], []
+        seen = set()
+
+        for op, words, target in (("add", add, to_add), ("remove", remove, to_remove)):
+            for word in words:
+                if not isinstance(word, str) or not word.strip():
+                    results.append({"word": word, "op": op, "status": "invalid"})
+                elif word in seen:
+                    # Listed twice, or in both add and remove: only the first one counts
+                    results.append({"word": word, "op": op, "status": "duplicate"})
+                else:
+                    seen.add(word)
+                    target.append(word)
+                    results.append({"word": word, "op": op, "status": None})
+
+        if not to_add and not to_remove:
+            return results
+
+        present = self.cmd.bulk_update_words(pack_name, to_add, to_remove)
+        self.cache.invalidate(pack_name)
+
+        if present is None:
+            raise LookupError("Pack not found")
+
+        for result in results:
+            if result["status"] is not None:
+                continue
+            if result["op"] == "add":
+                result["status"] = "exists" if result["word"] in present else "added"
+            else:
+                result["status"] = "removed" if result["word"] in present else "missing"
+
+        self._notify(
+            pack_name,
+            added=[r["word"] for r in results if r["status"] == "added"],
+            removed=[r["word"] for r in results if r["status"] == "removed"]
+        )
+        return results
+
+    def cache_stats(self):
+        return self.cache.stats()
+
+    def pool_stats(self):
+        return pool_stats()
+
+    def index_report(self):
+        return self.cmd.indexes.usage_report()
+
+
+_pack_service = None
+
+def get_pack_service():
+    """
+    The process-wide PackService, built on first use. Building it connects to
+    MongoDB, ensures indexes and seeds default packs, so nothing does that at import.
+    """
+    global _pack_service
+    if _pack_service is None:
+        _pack_service = PackService()
+    return _pack_service
\ No newline at end of file
@@ -44,6 +44,10 @@ export function initChatDOM(chatContainer) {
             msg.classList.add("chat-leave");
             msg.textContent = `${data.message}`;
         }
+        else if (data.type === "close") {
+            msg.classList.add("chat-close");
+            msg.textContent = `'${data.message}' is close!`;
+        }
         else if (data.type === "reveal") {
             msg.classList.add("chat-reveal");
             msg.textContent = `The word was ${data.word}!`;
@@ -98,6 +102,16 @@ export function initChatDOM(chatContainer) {
         }
     });
 
+    socket.on("rateLimited", (data) => {
+        if (data.event !== "chatMessage") return;
+
+        const sys = document.createElement("div");
+        sys.classList.add("chat-system");
+        sys.textContent = "You're sending messages too fast, slow down.";
+        chatHistory.append(sys);
+        chatHistory.scrollTop = chatHistory.scrollHeight;
+    });
+
     socket.on("waitingForPlayers", (data) => {
         const sys = document.createElement("div");
         sys.classList.add("chat-system");
@@ -1,4 +1,5 @@
 // drawing.js - handles brush drawing, colors, eraser, etc.
+import { encodeFrame } from "./wire.js";
 
 let ctx;
 let drawing = false;
@@ -8,11 +9,41 @@ let lastY = 0;
 let remoteLastX = 0;
 let remoteLastY = 0;
 
+// Live events that arrive while a canvasSnapshot is still decoding
+let pendingRemote = null;
+
+// Op kinds used by the server's canvasSnapshot payload
+const SNAPSHOT_OP_EVENTS = ["startPath", "dot", "fill"];
+
+// Local copy of the canvas as undoable actions, so undo/redo deltas redraw locally
+let baseImage = null;   // checkpoint bitmap underneath the actions
+let baseActions = 0;    // actions baked into baseImage
+let actions = [];       // { events: [[type, data], ...], joinable, open }
+let socketRef = null;
+
+// Set once the server accepts the binary wire format at join
+let binaryWire = false;
+
 // Updated externally by your UI
 let currentColor = "black";
 let currentSize = 5;
 let currentTool = "brush";  // brush | eraser
 
+export function setBinaryWire(state) {
+    binaryWire = state;
+}
+
+// Sends one drawing event to the server in the negotiated wire format
+function sendDrawEvent(type, data) {
+    if (binaryWire) {
+        socketRef.emit("drawBin", encodeFrame(type, data));
+    } else if (data === undefined) {
+        socketRef.emit(type);
+    } else {
+        socketRef.emit(type, data);
+    }
+}
+
 export function setDrawingEnabled(state) {
     drawingEnabled = state;
 }
@@ -39,9 +70,13 @@ export function undo() {
 }
 
 export function initCanvas(canvas, socket) {
+    socketRef = socket;
     ctx = canvas.getContext("2d");
     ctx.imageSmoothingEnabled = false;
 
+    // Server rasterizes checkpoints at the drawer's canvas size
+    socket.emit("canvasSize", { width: canvas.width, height: canvas.height });
+
     // Stroke smoothing
     ctx.lineCap = "round";
     ctx.lineJoin = "round";
@@ -56,7 +91,9 @@ export function initCanvas(canvas, socket) {
         if (currentTool === "fill") {
             fillBucket(x, y);
 
-            socket.emit("fill", { x, y, color: currentColor });
+            const fill = { x, y, color: currentColor };
+            recordEvent("fill", fill);
+            sendDrawEvent("fill", fill);
 
             return;
         }
@@ -64,13 +101,16 @@ export function initCanvas(canvas, socket) {
         drawing = true;
         lastX = x;
         lastY = y;
-        socket.emit("startPath", {
+
+        const start = {
             x,
             y,
             size: currentSize,
             color: currentColor,
             tool: currentTool
-        });
+        };
+        recordEvent("startPath", start);
+        sendDrawEvent("startPath", start);
     });
 
     canvas.addEventListener("click", (e) => {
@@ -84,13 +124,15 @@ export function initCanvas(canvas, socket) {
         ctx.fillStyle = currentTool === "eraser" ? "white" : currentColor;
         ctx.fill();
 
-        socket.emit("dot", {
+        const dot = {
             x,
             y,
             size: currentSize,
             color: currentColor,
             tool: currentTool
-        });
+        };
+        recordEvent("dot", dot);
+        sendDrawEvent("dot", dot);
     });
 
     canvas.addEventListener("mouseup", () => {
@@ -98,14 +140,14 @@ export function initCanvas(canvas, socket) {
         drawing = false;
         solidifyEdges();
 
-        socket.emit("endPath");
+        sendDrawEvent("endPath");
     });
 
     canvas.addEventListener("mouseleave", () => {
         drawing = false;
         solidifyEdges();
 
-        socket.emit("endPath");
+        sendDrawEvent("endPath");
     });
 
     canvas.addEventListener("mousemove", (e) => {
@@ -115,10 +157,12 @@ export function initCanvas(canvas, socket) {
         if (currentTool === "brush" || currentTool === "eraser") {
             drawStroke(e.offsetX, e.offsetY);
 
-            socket.emit("draw", {
+            const point = {
                 x: e.offsetX,
                 y: e.offsetY
-            });
+            };
+            recordEvent("draw", point);
+            sendDrawEvent("draw", point);
         }
     });
 }
@@ -176,7 +220,7 @@ function colorsMatch(a, b, tolerance = 6) {
     );
 }
 
-function fillBucket(startX, startY) {
+function fillBucket(startX, startY, color = currentColor) {
     const canvas = ctx.canvas;
     const w = canvas.width;
     const h = canvas.height;
@@ -186,7 +230,7 @@ function fillBucket(startX, startY) {
 
     // Convert currentColor to RGBA
     const temp = document.createElement("canvas").getContext("2d");
-    temp.fillStyle = currentColor;
+    temp.fillStyle = color;
     temp.fillRect(0, 0, 1, 1);
     const fillColor = temp.getImageData(0, 0, 1, 1).data;
 
@@ -317,7 +361,158 @@ export function loadCanvasFromImage(imgURL) {
     };
 }
 
+async function decodeSnapshotData(snapshot) {
+    if (snapshot.encoding !== "deflate") return JSON.parse(snapshot.data);
+
+    const stream = new Blob([snapshot.data])
+        .stream()
+        .pipeThrough(new DecompressionStream("deflate"));
+    return JSON.parse(await new Response(stream).text());
+}
+
+// Expands packed ops (canvasSnapshot / restoreStroke) back into socket events
+function unpackOps(styles, ops) {
+    const events = [];
+
+    for (const [kind, styleIdx, deltas] of ops) {
+        const type = SNAPSHOT_OP_EVENTS[kind];
+        const [color, size, tool] = styles[styleIdx];
+
+        // Points after the first arrive as deltas from the previous point
+        const points = deltas.slice();
+        for (let i = 2; i < points.length; i++) points[i] += points[i - 2];
+
+        events.push([type, { x: points[0], y: points[1], size, color, tool }]);
+
+        if (type === "startPath") {
+            for (let i = 2; i < points.length; i += 2) {
+                events.push(["draw", { x: points[i], y: points[i + 1] }]);
+            }
+        }
+    }
+
+    return events;
+}
+
+function resetActionLog(image = null, base = 0) {
+    baseImage = image;
+    baseActions = base;
+    actions = [];
+}
+
+// Groups events into undoable actions exactly like the server's CanvasHistory
+function recordEvent(type, data) {
+    const last = actions[actions.length - 1];
+
+    if (type === "draw") {
+        if (last && last.open) last.events.push([type, data]);
+        return;
+    }
+
+    // The click that follows a stroke or fill belongs to the same action
+    if (type === "dot" && last && last.joinable) {
+        last.events.push([type, data]);
+        last.joinable = false;
+        last.open = false;
+        return;
+    }
+
+    if (type === "startPath" || type === "dot" || type === "fill") {
+        actions.push({
+            events: [[type, data]],
+            joinable: type !== "dot",
+            open: type === "startPath",
+        });
+    }
+}
+
+function redrawFromLog() {
+    clearCanvas();
+    if (baseImage) ctx.drawImage(baseImage, 0, 0);
+    actions.forEach(action => action.events.forEach(([type, data]) => paintEvent(type, data)));
+}
+
+function requestResync() {
+    if (socketRef) socketRef.emit("resync");
+}
+
+// Replays a whole canvas sent in one canvasSnapshot frame
+export async function applyCanvasSnapshot(snapshot) {
+    if (pendingRemote === null) pendingRemote = [];
+
+    try {
+        const { styles, ops } = await decodeSnapshotData(snapshot);
+        const checkpoint = snapshot.checkpoint
+            ? await createImageBitmap(new Blob([snapshot.checkpoint], { type: "image/png" }))
+            : null;
+
+        resetActionLog(checkpoint, snapshot.baseActions || 0);
+        unpackOps(styles, ops).forEach(([type, data]) => recordEvent(type, data));
+        redrawFromLog();
+    } catch (err) {
+        console.error("Could not apply canvas snapshot", err);
+    }
+
+    // Apply anything that arrived while decoding, in order
+    const queued = pendingRemote;
+    pendingRemote = null;
+    queued.forEach(([type, data]) => handleRemoteEvent(type, data));
+}
+
 export function applyRemoteEvent(type, data) {
+    if (pendingRemote !== null) {
+        pendingRemote.push([type, data]);
+        return;
+    }
+
+    handleRemoteEvent(type, data);
+}
+
+// Clears the canvas and forgets its history (drawer's clear button)
+export function resetCanvas() {
+    resetActionLog();
+    clearCanvas();
+}
+
+function handleRemoteEvent(type, data) {
+    switch (type) {
+        case "removeStroke":
+            // Server's action count after the undo; anything else means we drifted
+            if (!actions.length || baseActions + actions.length - 1 !== data.actions) {
+                requestResync();
+                return;
+            }
+            actions.pop();
+            redrawFromLog();
+            return;
+
+        case "restoreStroke":
+            unpackOps(data.styles, data.ops).forEach(([t, d]) => {
+                recordEvent(t, d);
+                paintEvent(t, d);
+            });
+            if (baseActions + actions.length !== data.actions) requestResync();
+            return;
+
+        case "clear":
+            resetCanvas();
+            return;
+
+        case "drawBatch":
+            // Points the server gathered over one tick, as flat x, y pairs
+            for (let i = 0; i + 1 < data.points.length; i += 2) {
+                const point = { x: data.points[i], y: data.points[i + 1] };
+                recordEvent("draw", point);
+                paintEvent("draw", point);
+            }
+            return;
+    }
+
+    recordEvent(type, data);
+    paintEvent(type, data);
+}
+
+function paintEvent(type, data) {
 
     switch (type) {
         case "startPath":
@@ -347,12 +542,7 @@ export function applyRemoteEvent(type, data) {
             break;
 
         case "fill":
-            setBrushColor(data.color);
-            fillBucket(data.x, data.y);
-            break;
-
-        case "clear":
-            clearCanvas();
+            fillBucket(data.x, data.y, data.color);
             break;
     }
-}
\ No newline at end of file
+}
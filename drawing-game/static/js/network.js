@@ -1,5 +1,6 @@
 // network.js - Updated timer logic
-import { applyRemoteEvent, setDrawingEnabled } from "./drawing.js";
+import { applyRemoteEvent, applyCanvasSnapshot, setDrawingEnabled, setBinaryWire } from "./drawing.js";
+import { decodeFrame } from "./wire.js";
 import { updateScoreboard } from "./setup.js";
 
 const ROUND_TIME = 100;
@@ -7,6 +8,41 @@ let socket = null;
 let roundTimer = null;
 let roundStartTime = null; // <-- NEW: Store when round started
 
+// Local scoreboard kept in step with the server's seq-numbered updates
+let scoreboardSeq = 0;
+let scoreboardPlayers = new Map();  // id -> { id, name, avatar, score }
+
+// Lobby comes from the page URL, e.g. /?lobby=friends (server defaults to "main")
+function getLobbyId() {
+    return new URLSearchParams(window.location.search).get("lobby") || "main";
+}
+
+// Optional stroke quality for a new lobby: lossless | high | medium | low
+function getStrokeQuality() {
+    return new URLSearchParams(window.location.search).get("quality") || undefined;
+}
+
+// Optional word pack for a new lobby, e.g. /?lobby=friends&pack=animal-pack
+function getPackName() {
+    return new URLSearchParams(window.location.search).get("pack") || undefined;
+}
+
+function renderScoreboard() {
+    updateScoreboard([...scoreboardPlayers.values()]);
+}
+
+// Applies one seq-numbered update; a gap means we missed one, so ask for a full sync
+function applyScoreboardUpdate(seq, apply) {
+    if (seq <= scoreboardSeq) return;
+    if (seq !== scoreboardSeq + 1) {
+        socket.emit("scoreboardResync");
+        return;
+    }
+    scoreboardSeq = seq;
+    apply();
+    renderScoreboard();
+}
+
 export function connectToServer(playerData, onConnected) {
     socket = io();
 
@@ -15,13 +51,44 @@ export function connectToServer(playerData, onConnected) {
             id: playerData.id,
             name: playerData.name,
             avatar: playerData.avatar,
+            lobby: getLobbyId(),
+            quality: getStrokeQuality(),
+            pack: getPackName(),
+            binary: true,
         });
 
         if (onConnected) onConnected(socket);
     });
 
-	socket.on("playerList", (players) => {
-		updateScoreboard(players);
+	socket.on("packChanged", (data) => {
+		console.log("Word pack:", data.pack);
+	});
+
+	socket.on("packError", (data) => {
+		console.warn("Could not switch word pack:", data.error);
+	});
+
+	socket.on("scoreboardSync", (data) => {
+		scoreboardSeq = data.seq;
+		scoreboardPlayers = new Map(data.players.map(p => [p.id, p]));
+		renderScoreboard();
+	});
+
+	socket.on("playerJoined", (data) => {
+		applyScoreboardUpdate(data.seq, () => scoreboardPlayers.set(data.player.id, data.player));
+	});
+
+	socket.on("playerLeft", (data) => {
+		applyScoreboardUpdate(data.seq, () => scoreboardPlayers.delete(data.id));
+	});
+
+	socket.on("scoreDelta", (data) => {
+		applyScoreboardUpdate(data.seq, () => {
+			data.scores.forEach(([id, score]) => {
+				const player = scoreboardPlayers.get(id);
+				if (player) player.score = score;
+			});
+		});
 	});
 
 	socket.on("roundStarting", () => {
@@ -87,18 +154,14 @@ export function connectToServer(playerData, onConnected) {
 		function updateTimer() {
 			const now = Date.now() / 1000; // Current time in seconds
 			const elapsed = now - roundStartTime;
-			const remaining = Math.max(0, Math.ceil(ROUND_TIME - elapsed));
+			const remaining = Math.max(0, Math.ceil((data.duration || ROUND_TIME) - elapsed));
 
 			if (timerTextEl) timerTextEl.textContent = remaining;
 
-			// Only drawer emits round end
+			// The server ends the round on its own clock
 			if (remaining <= 0) {
 				clearInterval(roundTimer);
 				roundTimer = null;
-				
-				if (isDrawer) {
-					socket.emit("forceRoundEnd");
-				}
 			}
 		}
 
@@ -131,13 +194,23 @@ export function connectToServer(playerData, onConnected) {
 		}
 	});
 
+	// Server confirms which encoding drawing events use on this connection
+	socket.on("wireFormat", data => setBinaryWire(!!data.binary));
+	socket.on("drawBin", frame => {
+		const event = decodeFrame(frame);
+		if (event) applyRemoteEvent(event[0], event[1]);
+	});
+
 	socket.on("startPath", data => applyRemoteEvent("startPath", data));
 	socket.on("draw", data => applyRemoteEvent("draw", data));
+	socket.on("drawBatch", data => applyRemoteEvent("drawBatch", data));
 	socket.on("dot", data => applyRemoteEvent("dot", data));
 	socket.on("endPath", () => applyRemoteEvent("endPath"));
 	socket.on("fill", data => applyRemoteEvent("fill", data));
-	socket.on("undo", () => {});
+	socket.on("removeStroke", data => applyRemoteEvent("removeStroke", data));
+	socket.on("restoreStroke", data => applyRemoteEvent("restoreStroke", data));
 	socket.on("clear", () => applyRemoteEvent("clear"));
+	socket.on("canvasSnapshot", data => applyCanvasSnapshot(data));
 }
 
 export function getSocket() {
@@ -1,6 +1,6 @@
 // setup.js - initializes the game and name + avatar creation
 import { connectToServer, getSocket } from "./network.js";
-import { initCanvas, setBrushColor, setBrushSize, setTool, clearCanvas, undo } from "./drawing.js";
+import { initCanvas, setBrushColor, setBrushSize, setTool, resetCanvas, undo } from "./drawing.js";
 import { initChatDOM } from "./chat.js";
 
 let nameInput;
@@ -510,6 +510,20 @@ function createTools(drawtools) {
 		if (socket) socket.emit("undo");
 	});
 
+	// Redo Button
+	const redoContainer = document.createElement("div");
+	redoContainer.classList.add("redo-container");
+	const redoIcon = document.createElement("img");
+	redoIcon.classList.add("redo-icon");
+	redoIcon.src = "static/images/icons/undo.svg";
+	redoIcon.alt = "Redo";
+	redoContainer.append(redoIcon);
+
+	redoContainer.addEventListener("click", () => {
+		const socket = getSocket();
+		if (socket) socket.emit("redo");
+	});
+
 	// Clear Button
 	const clearContainer = document.createElement("div");
 	clearContainer.classList.add("clear-container");
@@ -520,12 +534,13 @@ function createTools(drawtools) {
 	clearContainer.append(clearIcon);
 
 	clearContainer.addEventListener("click", () => {
-		clearCanvas();
+		resetCanvas();
 		const socket = getSocket();
 		if (socket) socket.emit("clear");
 	});
 
 	rightGroup.append(undoContainer);
+	rightGroup.append(redoContainer);
 	rightGroup.append(clearContainer);
 }
 
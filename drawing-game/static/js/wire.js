@@ -0,0 +1,116 @@
+// wire.js - binary frames for drawing events (mirrors game/wire.py)
+
+const OP_BY_EVENT = {
+    startPath: 1,
+    dot: 2,
+    fill: 3,
+    draw: 4,
+    drawBatch: 5,
+    endPath: 6,
+};
+const EVENT_BY_OP = Object.fromEntries(Object.entries(OP_BY_EVENT).map(([type, op]) => [op, type]));
+
+const TOOLS = ["brush", "eraser", "fill"];
+
+const encoder = new TextEncoder();
+const decoder = new TextDecoder();
+
+function coord(value) {
+    return Math.min(65535, Math.max(0, Math.round(Number(value) || 0)));
+}
+
+export function encodeFrame(type, data = {}) {
+    const op = OP_BY_EVENT[type];
+    const color = encoder.encode(String(data.color ?? "")).slice(0, 255);
+
+    let buf;
+    let view;
+    switch (type) {
+        case "startPath":
+        case "dot":
+            buf = new ArrayBuffer(9 + color.length);
+            view = new DataView(buf);
+            view.setUint16(1, coord(data.x), true);
+            view.setUint16(3, coord(data.y), true);
+            view.setUint16(5, coord(data.size), true);
+            view.setUint8(7, Math.max(0, TOOLS.indexOf(data.tool)));
+            view.setUint8(8, color.length);
+            new Uint8Array(buf, 9).set(color);
+            break;
+
+        case "fill":
+            buf = new ArrayBuffer(6 + color.length);
+            view = new DataView(buf);
+            view.setUint16(1, coord(data.x), true);
+            view.setUint16(3, coord(data.y), true);
+            view.setUint8(5, color.length);
+            new Uint8Array(buf, 6).set(color);
+            break;
+
+        case "draw":
+            buf = new ArrayBuffer(5);
+            view = new DataView(buf);
+            view.setUint16(1, coord(data.x), true);
+            view.setUint16(3, coord(data.y), true);
+            break;
+
+        default:
+            buf = new ArrayBuffer(1);
+            view = new DataView(buf);
+    }
+
+    view.setUint8(0, op);
+    return buf;
+}
+
+// Returns [type, data] in the same shape as the JSON events, or null if malformed
+export function decodeFrame(buf) {
+    const bytes = buf instanceof ArrayBuffer ? new Uint8Array(buf) : new Uint8Array(buf.buffer, buf.byteOffset, buf.byteLength);
+    if (!bytes.length) return null;
+
+    const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    const type = EVENT_BY_OP[bytes[0]];
+
+    const readColor = (offset) => {
+        const length = bytes[offset];
+        return decoder.decode(bytes.subarray(offset + 1, offset + 1 + length));
+    };
+
+    try {
+        switch (type) {
+            case "startPath":
+            case "dot":
+                return [type, {
+                    x: view.getUint16(1, true),
+                    y: view.getUint16(3, true),
+                    size: view.getUint16(5, true),
+                    tool: TOOLS[view.getUint8(7)] || TOOLS[0],
+                    color: readColor(8),
+                }];
+
+            case "fill":
+                return [type, {
+                    x: view.getUint16(1, true),
+                    y: view.getUint16(3, true),
+                    color: readColor(5),
+                }];
+
+            case "draw":
+                return [type, { x: view.getUint16(1, true), y: view.getUint16(3, true) }];
+
+            case "drawBatch": {
+                const points = [];
+                for (let i = 1; i + 3 < bytes.length; i += 4) {
+                    points.push(view.getUint16(i, true), view.getUint16(i + 2, true));
+                }
+                return [type, { points }];
+            }
+
+            case "endPath":
+                return [type, {}];
+        }
+    } catch (e) {
+        // RangeError from a truncated frame
+    }
+    return null;
+}